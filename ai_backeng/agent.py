@@ -68,14 +68,21 @@ Descripción libre del usuario:
 """.strip()
 
 
+def format_career(career: dict) -> str:
+    """Fragmento del prompt de una carrera (el catálogo lo trae precalculado)."""
+    return (
+        f"- {career['career_name']} "
+        f"(Modalidad: {career['modality']}, Duración: {career['duration']} semestres)\n"
+        f"  {(career.get('description') or '')[:300]}"
+    )
+
+
 def format_careers(careers: list[dict], limit: int = 5) -> str:
     if not careers:
         return "No hay carreras aún."
 
     return "\n".join(
-        f"- {c['career_name']} "
-        f"(Modalidad: {c['modality']}, Duración: {c['duration']} semestres)\n"
-        f"  {c['description'][:300]}"
+        c.get("prompt_snippet") or format_career(c)
         for c in careers[:limit]
     )
 
@@ -87,25 +94,39 @@ def build_user_embedding_text(profile: dict) -> str:
     """
     partes = []
 
+    # Listas ordenadas: el mismo perfil produce siempre el mismo texto
+    # (y así el mismo key en el caché de embeddings)
     if profile.get("intereses"):
-        partes.append("Intereses: " + ", ".join(profile["intereses"]))
+        partes.append("Intereses: " + ", ".join(sorted(profile["intereses"])))
     if profile.get("habilidades_percibidas"):
-        partes.append("Habilidades: " + ", ".join(profile["habilidades_percibidas"]))
+        partes.append("Habilidades: " + ", ".join(sorted(profile["habilidades_percibidas"])))
     if profile.get("materias_fuertes"):
-        partes.append("Materias fuertes: " + ", ".join(profile["materias_fuertes"]))
+        partes.append("Materias fuertes: " + ", ".join(sorted(profile["materias_fuertes"])))
     if profile.get("materias_debiles"):
-        partes.append("Materias débiles: " + ", ".join(profile["materias_debiles"]))
+        partes.append("Materias débiles: " + ", ".join(sorted(profile["materias_debiles"])))
 
     return ". ".join(partes)
 
 
+# Mismos valores que guarda el loader en careers.modality_norm
+MODALITY_ALIASES = {
+    "presencial": "presencial",
+    "presencial diurna": "presencial",
+    "presencial nocturna": "presencial",
+    "hibrida": "hibrida",
+    "semipresencial": "hibrida",
+    "dual": "dual",
+    "en linea": "en linea",
+    "virtual": "en linea",
+    "online": "en linea",
+}
+
+
 def normalize_modality(modality):
     """
-    Convierte modalidad a minúsculas, sin tildes, y asegura que sea solo
-    una de las opciones válidas: 'presencial', 'dual', 'hibrida'.
+    Convierte modalidad a minúsculas, sin tildes, y la lleva a uno de los
+    valores de careers.modality_norm: 'presencial', 'hibrida', 'dual', 'en linea'.
     """
-    import unicodedata
-
     if not modality:
         return None
 
@@ -114,17 +135,14 @@ def normalize_modality(modality):
         modality = modality[0]
 
     # Normalizar a string y quitar tildes
-    modality = str(modality).lower().strip()
+    modality = " ".join(str(modality).lower().split())
     modality = ''.join(
         c for c in unicodedata.normalize('NFD', modality)
         if unicodedata.category(c) != 'Mn'
     )
 
     # Filtrar solo opciones válidas
-    if modality not in ('presencial', 'dual', 'hibrida'):
-        return None
-
-    return modality
+    return MODALITY_ALIASES.get(modality)
 
 # ------------------------------------------------------------------
 # HELPERS
@@ -141,29 +159,32 @@ def merge_lists(existing, new):
 # AGENTE PRINCIPAL
 # ------------------------------------------------------------------
 
-def run_agent(
+async def run_agent(
     user_message: str,
     profile: dict,
     careers: list[dict],
     should_greet: bool
 ) -> str:
     chunks = []
-    for chunk in run_agent_stream(
+    async for text in run_agent_stream(
         user_message,
         profile,
         careers,
         should_greet
     ):
-        chunks.append(chunk)
+        chunks.append(text)
     return "".join(chunks)
 
 
-def run_agent_stream(
+async def run_agent_stream(
     user_message: str,
     profile: dict,
     careers: list[dict],
     should_greet: bool
 ):
+    """
+    Genera la respuesta del agente como stream async de fragmentos de texto.
+    """
     greeting_rule = (
         "Saluda brevemente al usuario usando su nombre."
         if should_greet
@@ -199,17 +220,11 @@ CARRERAS DISPONIBLES
 {format_careers(careers)}
 """.strip()
 
-    stream = model.generate_content(
+    stream = await model.generate_content_async(
         full_prompt,
         stream=True
     )
-    
-    for chunk in stream:
-        print("#######################################################")
-        print(chunk)
-        print("#######################################################")
 
+    async for chunk in stream:
         if chunk.text:
-            yield chunk
-
-
+            yield chunk.text
@@ -0,0 +1,27 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Hilos reservados para llamadas bloqueantes que no tienen cliente async.
+# Acotado a propósito: si se llena, las llamadas esperan en cola en lugar
+# de crear hilos sin límite.
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", 16))
+
+_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_WORKERS,
+    thread_name_prefix="blocking"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante en el executor acotado
+    sin bloquear el event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,258 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from uuid import UUID
+from ai_backeng.db.postgres import get_pool
+from ai_backeng.embeddings.embedding_provider import get_embedding
+from ai_backeng.embeddings.blend import blend_embeddings
+from ai_backeng.matching.get_best_careers import get_best_careers, recall_candidates, rank_recalled
+from ai_backeng.agent import run_agent, run_agent_stream, build_user_embedding_text
+from ai_backeng.memory.extractor import extract_profile_updates
+from ai_backeng.memory.tiempo import should_greet_user
+from ai_backeng.scheduler import TurnScheduler, StageHook
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+def normalize_for_json(obj):
+    if isinstance(obj, dict):
+        return {k: normalize_for_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [normalize_for_json(v) for v in obj]
+    if isinstance(obj, UUID):
+        return str(obj)
+    return obj
+
+
+# ------------------------------------------------------------------
+# HELPERS
+# ------------------------------------------------------------------
+
+LIST_FIELDS = ("habilidades_percibidas", "materias_fuertes", "materias_debiles", "intereses")
+
+
+def merge_profile_update(user_memory: dict, profile_update: dict):
+    """
+    Fusiona lo extraído en el turno con la memoria existente (in place).
+    """
+    # Nombre
+    if profile_update.get("nombre"):
+        user_memory["nombre"] = profile_update["nombre"]
+
+    # Preferencias (aceptamos False, p. ej. universidad_publica)
+    for key, value in profile_update.get("preferencias", {}).items():
+        if value is not None:
+            user_memory.setdefault("preferencias", {})[key] = value
+
+    # Listas: unión sin duplicados
+    for field in LIST_FIELDS:
+        if profile_update.get(field):
+            user_memory[field] = list(
+                set(user_memory.get(field, []) + profile_update.get(field, []))
+            )
+
+    # Limpiar intereses que el usuario no quiere
+    for materia in profile_update.get("materias_debiles", []):
+        if materia in user_memory.get("intereses", []):
+            user_memory["intereses"].remove(materia)
+
+
+def build_match_preferences(user_memory: dict) -> dict:
+    """Copia (no vista) de lo que usa el matching: merge_profile_update muta las listas."""
+    return {
+        **user_memory.get("preferencias", {}),
+        "intereses": list(user_memory.get("intereses", [])),
+        "habilidades_percibidas": list(user_memory.get("habilidades_percibidas", [])),
+        "materias_fuertes": list(user_memory.get("materias_fuertes", []))
+    }
+
+
+def same_match_preferences(a: dict, b: dict) -> bool:
+    """Compara preferencias de matching ignorando el orden de las listas."""
+    def norm(p):
+        return {k: sorted(v) if isinstance(v, list) else v for k, v in p.items()}
+    return norm(a) == norm(b)
+
+
+async def match_careers(pool, user_embedding, preferences, deadline=None):
+    if not user_embedding:
+        return []
+    return await get_best_careers(pool, user_embedding, preferences, deadline=deadline)
+
+
+async def recall_careers(pool, user_embedding, preferences):
+    if not user_embedding:
+        return None
+    return await recall_candidates(pool, user_embedding, preferences)
+
+
+async def rank_careers(recall, preferences, deadline=None):
+    if recall is None:
+        return []
+    return await rank_recalled(recall, preferences, deadline=deadline)
+
+
+# ------------------------------------------------------------------
+# MOTOR DEL TURNO
+# ------------------------------------------------------------------
+
+class ConversationTurn:
+    """
+    Un turno de conversación, compartido por /chat y /chat/stream:
+    memoria → extracción (+ recall especulativo) → embedding → matching
+    → respuesta del agente → persistencia.
+
+    Cada etapa pasa por el TurnScheduler, así que los hooks de timing
+    y caché se aplican igual en ambos endpoints.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        message: str,
+        session_manager,
+        hooks: list[StageHook] | None = None
+    ):
+        self.user_id = user_id
+        self.message = message
+        self.session_manager = session_manager
+        self.scheduler = TurnScheduler(hooks)
+
+        self.user_memory: dict = {}
+        self.careers: list[dict] = []
+        self.recommendations: list[dict] = []
+        self.should_greet = False
+
+    async def prepare(self) -> "ConversationTurn":
+        """Ejecuta todas las etapas previas a la generación."""
+        scheduler = self.scheduler
+        pool = await get_pool()
+
+        # 1. Recuperamos memoria de Redis
+        user_memory = await scheduler.run(
+            "session_load", self.session_manager.get_profile, self.user_id
+        )
+        self.user_memory = user_memory
+        meta = user_memory.setdefault("meta", {})
+
+        # 2. Decidimos saludo ANTES de tocar timestamps
+        self.should_greet = should_greet_user(meta)
+        if self.should_greet:
+            meta["last_greeted_at"] = now().isoformat()
+
+        # 3. Extractor en paralelo con un recall especulativo sobre el
+        #    embedding anterior (se reutiliza si el perfil de matching no cambia).
+        #    Solo el recall: rerank y grabación esperan a confirmar el perfil
+        previous_embedding = user_memory.get("user_embedding")
+        previous_preferences = build_match_preferences(user_memory)
+        speculative = None
+        if previous_embedding:
+            speculative = scheduler.start(
+                "recall_speculative",
+                recall_careers, pool, previous_embedding, previous_preferences
+            )
+
+        extraction_result = await scheduler.run(
+            "extraction", extract_profile_updates, self.message, user_memory
+        )
+
+        # 4. Fusionamos memoria existente con lo nuevo
+        merge_profile_update(user_memory, extraction_result["profile_data"])
+
+        # 5. Actualizamos meta
+        meta["last_seen_at"] = now().isoformat()
+        meta["message_count"] = meta.get("message_count", 0) + 1
+
+        # 6. Embeddings
+        if extraction_result["has_career_intent"]:
+            profile_text = build_user_embedding_text(user_memory)
+            new_emb = await scheduler.run("embedding", get_embedding, profile_text)
+            current_emb = user_memory.get("user_embedding")
+            user_memory["user_embedding"] = (
+                blend_embeddings(current_emb, new_emb) if current_emb else new_emb
+            )
+
+        # 7. Matching de carreras
+        preferences = build_match_preferences(user_memory)
+        if (
+            speculative is not None
+            and user_memory.get("user_embedding") is previous_embedding
+            and same_match_preferences(preferences, previous_preferences)
+        ):
+            self.careers = await scheduler.run(
+                "matching",
+                rank_careers, await speculative, preferences, scheduler.deadline
+            )
+        else:
+            await scheduler.cancel_pending()
+            self.careers = await scheduler.run(
+                "matching",
+                match_careers, pool, user_memory.get("user_embedding"), preferences,
+                scheduler.deadline
+            )
+
+        # 7.1 Recomendaciones del turno (se guardan con la sesión)
+        self._store_recommendations()
+
+        return self
+
+    def _store_recommendations(self):
+        """
+        Registros de las carreras del turno; se agregan al historial al
+        guardar la sesión (ZADD NX en Redis: las ya recomendadas se ignoran).
+        Ya serializables (ids de asyncpg como str): así también quedan en el
+        caché local de sesiones. Un mismo timestamp para todo el turno y la
+        posición en "rank": el historial desempata por ella (mejor primero).
+        """
+        timestamp = now_iso()
+        careers = [c for c in self.careers if c.get("career_id") is not None]
+        self.recommendations = normalize_for_json([
+            {
+                "career_id": c.get("career_id"),
+                "career_name": c.get("career_name"),
+                "university_id": c.get("university_id"),
+                "university_name": c.get("university_name"),
+                "timestamp": timestamp,
+                "rank": rank,
+                "context": self.message,
+                "score": c.get("score")
+            }
+            for rank, c in enumerate(careers)
+        ])
+
+    async def save(self):
+        """Persiste la sesión y las recomendaciones del turno en Redis (un round-trip)."""
+        await self.scheduler.run(
+            "session_save", self.session_manager.save_profile,
+            self.user_id, self.user_memory, self.recommendations
+        )
+
+    async def reply(self) -> str:
+        """Respuesta completa del agente; la sesión se guarda en paralelo."""
+        reply, _ = await asyncio.gather(
+            self.scheduler.run(
+                "agent", run_agent,
+                self.message, self.user_memory, self.careers, self.should_greet
+            ),
+            self.save()
+        )
+        return reply
+
+    async def stream(self):
+        """Fragmentos de texto del agente. Guardar la sesión queda a cargo del caller."""
+        start = time.perf_counter()
+        try:
+            async for text in run_agent_stream(
+                self.message, self.user_memory, self.careers, self.should_greet
+            ):
+                yield text
+        finally:
+            self.scheduler.record("agent", time.perf_counter() - start)
+
+    def finish(self) -> dict:
+        """Cierra el turno y devuelve los tiempos por etapa (ms)."""
+        return self.scheduler.finish()
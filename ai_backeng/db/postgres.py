@@ -1,6 +1,8 @@
 import os
 import asyncpg
 from dotenv import load_dotenv
+from ai_backeng.db.vector import register_vector_codec
+from ai_backeng.db.queries import AppConnection, prepare_statements
 
 load_dotenv()
 
@@ -12,6 +14,12 @@ if not DATABASE_URL:
 _pool: asyncpg.Pool | None = None
 
 
+async def init_connection(conn):
+    """Se ejecuta en cada conexión nueva del pool."""
+    await register_vector_codec(conn)
+    await prepare_statements(conn)
+
+
 async def init_db():
     """
     Inicializa el pool de conexiones.
@@ -22,7 +30,13 @@ async def init_db():
         _pool = await asyncpg.create_pool(
             DATABASE_URL,
             min_size=1,
-            max_size=10
+            max_size=10,
+            init=init_connection,
+            connection_class=AppConnection,
+            # Con filtros en el recall, pgvector >= 0.8 sigue recorriendo el
+            # índice HNSW hasta juntar LIMIT filas que cumplan el WHERE.
+            # Va como setting de sesión para que sobreviva al RESET ALL del pool.
+            server_settings={"hnsw.iterative_scan": "relaxed_order"}
         )
 
 
@@ -34,3 +48,11 @@ async def get_pool() -> asyncpg.Pool:
         raise RuntimeError("DB no inicializada. Llama init_db() primero.")
     return _pool
 
+
+
+async def connect_listener() -> asyncpg.Connection:
+    """
+    Conexión dedicada para LISTEN/NOTIFY (fuera del pool:
+    queda abierta mientras viva la app).
+    """
+    return await asyncpg.connect(DATABASE_URL)
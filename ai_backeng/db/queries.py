@@ -0,0 +1,152 @@
+import os
+import time
+import asyncpg
+from ai_backeng import metrics
+
+# Consultas calientes: se preparan (con nombre) en cada conexión del pool
+# al crearla, así el request no paga parse/plan en cada llamada.
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+
+QUERIES = {
+    # Recall por pgvector con filtros dentro de la búsqueda
+    # (fallback si el índice en memoria no está cargado).
+    # Filtra por las columnas normalizadas del loader (con índice), sin
+    # unaccent por fila. Las carreras virtuales cuentan para cualquier ciudad.
+    "recall_pgvector": """
+        SELECT
+            c.id AS career_id,
+            c.career_name,
+            c.description,
+            c.modality,
+            c.duration,
+            c.university_id,
+            u.name AS university_name,
+            1 - (c.embedding <=> $1::vector) AS score
+        FROM careers c
+        JOIN universities u ON u.id = c.university_id
+        WHERE c.embedding IS NOT NULL
+          AND ($3::text IS NULL OR c.modality_norm = $3)
+          AND ($4::text IS NULL OR c.cities_norm && ARRAY[$4::text, 'virtual'])
+          AND ($5::text IS NULL OR u.type_norm = $5)
+        ORDER BY c.embedding <=> $1::vector
+        LIMIT $2
+    """,
+
+    # Recall léxico sobre search_tsv (nombre, descripción y materias; GIN).
+    # $1 llega ya sin tildes, en sintaxis websearch ("a" or "b c"),
+    # con los mismos filtros que el recall vectorial.
+    "recall_lexical": """
+        SELECT
+            c.id AS career_id,
+            c.career_name,
+            c.description,
+            c.modality,
+            c.duration,
+            c.university_id,
+            u.name AS university_name,
+            ts_rank_cd(c.search_tsv, q) AS lexical_score
+        FROM careers c
+        JOIN universities u ON u.id = c.university_id
+        CROSS JOIN websearch_to_tsquery('spanish', $1::text) q
+        WHERE c.search_tsv @@ q
+          AND ($3::text IS NULL OR c.modality_norm = $3)
+          AND ($4::text IS NULL OR c.cities_norm && ARRAY[$4::text, 'virtual'])
+          AND ($5::text IS NULL OR u.type_norm = $5)
+        ORDER BY lexical_score DESC
+        LIMIT $2
+    """,
+
+    # Datos de los candidatos que devolvió el índice en memoria (ya filtrados)
+    "careers_by_id": """
+        SELECT
+            c.id AS career_id,
+            c.career_name,
+            c.description,
+            c.modality,
+            c.duration,
+            c.university_id,
+            u.name AS university_name
+        FROM careers c
+        JOIN universities u ON u.id = c.university_id
+        WHERE c.id = ANY($1::uuid[])
+    """,
+
+    # /users/{user_id}/recommendations/full
+    "recommendations_full": """
+        SELECT
+            c.id AS career_id,
+            c.career_name,
+            c.description,
+            c.modality,
+            c.duration,
+            u.name AS university_name
+        FROM careers c
+        JOIN universities u ON u.id = c.university_id
+        WHERE c.id = ANY($1::uuid[])
+    """,
+
+    # /careers
+    "careers_page": """
+        SELECT
+            c.id,
+            c.career_name,
+            c.faculty_name,
+            c.description,
+            c.duration,
+            c.modality,
+            c.cost,
+            c.career_url,
+            u.url_logo,
+            u.name AS university_name
+        FROM careers c
+        LEFT JOIN universities u ON c.university_id = u.id
+        ORDER BY c.career_name
+        LIMIT $1 OFFSET $2
+    """,
+
+    # /universities
+    "universities_page": """
+        SELECT * FROM universities
+        ORDER BY id
+        LIMIT $1 OFFSET $2
+    """,
+}
+
+
+class AppConnection(asyncpg.Connection):
+    """Conexión del pool con sus sentencias preparadas por nombre."""
+    prepared: dict
+
+
+async def prepare_statements(conn):
+    conn.prepared = {}
+    for name, sql in QUERIES.items():
+        try:
+            conn.prepared[name] = await conn.prepare(sql, name=f"q_{name}")
+        except asyncpg.PostgresError as e:
+            # Esquema incompleto (p. ej. sin la función de pgvector): se
+            # ejecuta como SQL normal y no tumba el pool
+            print(f"⚠ No se pudo preparar '{name}': {e}")
+
+
+async def fetch(conn, name: str, *args):
+    """Ejecuta una consulta registrada midiendo su tiempo."""
+    start = time.perf_counter()
+
+    statement = getattr(conn, "prepared", {}).get(name)
+    if statement is None:
+        rows = await conn.fetch(QUERIES[name], *args)
+    else:
+        try:
+            rows = await statement.fetch(*args)
+        except asyncpg.exceptions.InvalidCachedStatementError:
+            # Cambió el esquema: se vuelve a preparar una vez
+            conn.prepared[name] = await conn.prepare(QUERIES[name])
+            rows = await conn.prepared[name].fetch(*args)
+
+    elapsed = time.perf_counter() - start
+    metrics.observe(f"sql.{name}", elapsed)
+    if elapsed * 1000 > SLOW_QUERY_MS:
+        print(f"🐢 Consulta lenta '{name}': {elapsed * 1000:.1f}ms")
+    return rows
@@ -0,0 +1,94 @@
+import os
+import time
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from dotenv import load_dotenv
+from ai_backeng import metrics
+
+load_dotenv()
+
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+
+# Conexiones por worker; si se agotan, el comando espera (hasta el timeout)
+# en lugar de abrir conexiones sin límite
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 2))
+
+_pool: redis.BlockingConnectionPool | None = None
+_client: redis.Redis | None = None
+
+
+class TimedPipeline(Pipeline):
+    """Pipeline que registra la latencia del round-trip completo."""
+
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            metrics.observe("redis.pipeline", time.perf_counter() - start)
+
+
+class TimedRedis(redis.Redis):
+    """Cliente que registra la latencia de cada comando (redis.<COMANDO> en /metrics)."""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            command = args[0].decode() if isinstance(args[0], bytes) else str(args[0])
+            metrics.observe(f"redis.{command.upper()}", time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+async def init_redis():
+    """
+    Inicializa el cliente async de Redis (con su pool de conexiones).
+    Se llama UNA sola vez al arrancar FastAPI.
+    """
+    global _pool, _client
+    if _client is None:
+        pool = redis.BlockingConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+            # Sin decode: los cachés guardan bytes (embeddings float32);
+            # json.loads acepta bytes directamente
+            decode_responses=False,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+        )
+        client = TimedRedis(connection_pool=pool)
+
+        # Test rápido de conexión (falla rápido si Redis no está)
+        try:
+            await client.ping()
+        except redis.ConnectionError as e:
+            await pool.aclose()
+            raise RuntimeError("No se pudo conectar a Redis") from e
+
+        _pool, _client = pool, client
+
+
+def get_redis() -> redis.Redis:
+    """
+    Devuelve el cliente ya inicializado.
+    """
+    if _client is None:
+        raise RuntimeError("Redis no inicializado. Llama init_redis() primero.")
+    return _client
+
+
+async def close_redis():
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+        await _pool.aclose()
+        _pool, _client = None, None
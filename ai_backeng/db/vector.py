@@ -1,2 +1,67 @@
+import struct
+import asyncpg
+import numpy as np
+
+
 def to_pgvector(vec: list[float]) -> str:
     return "[" + ",".join(str(x) for x in vec) + "]"
+
+
+# ------------------------------------------------------------------
+# Codec binario de pgvector para asyncpg
+# Formato: uint16 dim, uint16 sin uso, dim x float32 (big-endian)
+# ------------------------------------------------------------------
+
+def encode_vector(vec) -> bytes:
+    arr = np.asarray(vec, dtype=">f4")
+    return struct.pack(">HH", arr.shape[0], 0) + arr.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+
+def decode_vector_text(data: str) -> np.ndarray:
+    return np.array(data.strip("[]").split(","), dtype=np.float32)
+
+
+# Esquema donde se instaló la extensión (no siempre "public"); si hay más de
+# uno, el primero del search_path
+VECTOR_SCHEMA_QUERY = """
+    SELECT n.nspname
+    FROM pg_type t
+    JOIN pg_namespace n ON n.oid = t.typnamespace
+    WHERE t.typname = 'vector'
+    ORDER BY array_position(current_schemas(false), n.nspname::text) NULLS LAST
+    LIMIT 1
+"""
+
+
+async def register_vector_codec(conn) -> str | None:
+    """
+    Los embeddings viajan como buffers float32 en lugar de texto '[...]'.
+    Si el codec binario no se puede registrar se usa el formato texto; sin
+    pgvector no registra nada y no tumba la conexión (igual que
+    prepare_statements).
+    Devuelve el formato registrado ("binary" | "text") o None.
+    """
+    schema = await conn.fetchval(VECTOR_SCHEMA_QUERY)
+    if schema is None:
+        print("⚠ Tipo vector no encontrado (¿falta la extensión pgvector?)")
+        return None
+
+    codecs = (
+        ("binary", encode_vector, decode_vector),
+        # Texto: mismos tipos en Python, más bytes por embedding
+        ("text", lambda vec: to_pgvector(np.asarray(vec, dtype=np.float32).tolist()), decode_vector_text),
+    )
+    for fmt, encoder, decoder in codecs:
+        try:
+            await conn.set_type_codec(
+                "vector", schema=schema, encoder=encoder, decoder=decoder, format=fmt
+            )
+            return fmt
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, ValueError) as e:
+            print(f"⚠ No se pudo registrar el codec '{fmt}' de vector: {e}")
+    return None
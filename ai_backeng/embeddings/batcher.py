@@ -0,0 +1,76 @@
+import asyncio
+import os
+from ai_backeng import metrics
+
+# Ventana de espera para juntar pedidos concurrentes en un solo request
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", 5))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 64))
+
+
+class EmbeddingBatcher:
+    """
+    Junta las llamadas concurrentes a embed() que llegan dentro de una
+    ventana corta (o hasta llenar max_size) y las resuelve con UNA sola
+    llamada a embed_batch(texts).
+    """
+
+    def __init__(
+        self,
+        embed_batch,
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_size: int = EMBEDDING_BATCH_MAX_SIZE
+    ):
+        self.embed_batch = embed_batch
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run(batch))
+        # Referencia fuerte hasta que termine (si no, el GC puede cortarla)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]):
+        # Textos repetidos en la misma ventana se embeben una sola vez
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        metrics.incr("embedding_batcher.batches")
+        metrics.incr("embedding_batcher.requests", len(batch))
+        metrics.incr("embedding_batcher.texts", len(texts))
+
+        try:
+            embeddings = await self.embed_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, embeddings))
+        for text, future in batch:
+            # El caller pudo cancelarse (p. ej. matching especulativo)
+            if not future.done():
+                future.set_result(by_text[text])
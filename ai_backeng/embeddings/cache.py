@@ -0,0 +1,107 @@
+import hashlib
+import os
+import numpy as np
+import redis.asyncio as redis
+from ai_backeng import metrics
+from ai_backeng.cache import LRUCache
+from ai_backeng.db.redis_client import get_redis
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+# En Redis los embeddings se comparten entre workers y sobreviven reinicios
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", 60 * 60 * 24 * 7))
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def cache_key(model_name: str, text: str) -> str:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"emb:{model_name}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    Caché de embeddings por contenido: LRU en memoria delante de Redis.
+    Key = modelo + hash del texto normalizado.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.local = LRUCache(EMBEDDING_CACHE_SIZE)
+
+    async def get(self, text: str) -> list[float] | None:
+        key = cache_key(self.model_name, text)
+
+        embedding = self.local.get(key)
+        if embedding is not None:
+            metrics.incr("embedding_cache.hit_local")
+            return embedding
+
+        try:
+            data = await get_redis().get(key)
+        except redis.RedisError as e:
+            print(f"⚠ Caché de embeddings no disponible: {e}")
+            data = None
+
+        if data is None:
+            metrics.incr("embedding_cache.miss")
+            return None
+
+        metrics.incr("embedding_cache.hit_redis")
+        embedding = np.frombuffer(data, dtype=np.float32).tolist()
+        self.local.set(key, embedding)
+        return embedding
+
+    async def set(self, text: str, embedding: list[float]):
+        key = cache_key(self.model_name, text)
+        self.local.set(key, embedding)
+
+        try:
+            await get_redis().setex(
+                key,
+                EMBEDDING_CACHE_TTL,
+                np.asarray(embedding, dtype=np.float32).tobytes()
+            )
+        except redis.RedisError as e:
+            print(f"⚠ No se pudo guardar el embedding en Redis: {e}")
+
+    async def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Como get() para varios textos: los que no están en memoria van en un solo MGET."""
+        keys = [cache_key(self.model_name, text) for text in texts]
+        results = [self.local.get(key) for key in keys]
+        metrics.incr("embedding_cache.hit_local", sum(r is not None for r in results))
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            return results
+
+        try:
+            values = await get_redis().mget([keys[i] for i in missing])
+        except redis.RedisError as e:
+            print(f"⚠ Caché de embeddings no disponible: {e}")
+            values = [None] * len(missing)
+
+        for i, data in zip(missing, values):
+            if data is None:
+                metrics.incr("embedding_cache.miss")
+                continue
+            metrics.incr("embedding_cache.hit_redis")
+            results[i] = np.frombuffer(data, dtype=np.float32).tolist()
+            self.local.set(keys[i], results[i])
+        return results
+
+    async def set_many(self, items: dict[str, list[float]]):
+        """Guarda varios embeddings en un solo round-trip (pipeline sin MULTI)."""
+        if not items:
+            return
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for text, embedding in items.items():
+                    key = cache_key(self.model_name, text)
+                    self.local.set(key, embedding)
+                    pipe.setex(key, EMBEDDING_CACHE_TTL, np.asarray(embedding, dtype=np.float32).tobytes())
+                await pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠ No se pudieron guardar los embeddings en Redis: {e}")
@@ -1,30 +1,57 @@
 import os
 from dotenv import load_dotenv
-import voyageai
+from ai_backeng.embeddings.batcher import EmbeddingBatcher
+from ai_backeng.embeddings.cache import EmbeddingCache
+from ai_backeng.embeddings.providers import create_provider
 
 # Cargar variables desde .env
 load_dotenv()
 
-# Configuración
+# Configuración: voyage | local-e5 | local-e5-small | local-minilm
+# Los embeddings de las carreras en Postgres deben venir del mismo modelo
 PROVIDER = os.getenv("EMBEDDING_PROVIDER", "voyage")
 
-VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY")
-if not VOYAGE_API_KEY:
-    raise RuntimeError("VOYAGE_API_KEY not set in .env")
+provider = create_provider(PROVIDER)
 
-voyageai.api_key = VOYAGE_API_KEY
+EMBEDDING_MODEL_NAME = provider.model_name
 
-EMBEDDING_MODEL_NAME = "voyage-4-lite"
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL_NAME)
 
-client = voyageai.Client()
+# Usuarios concurrentes comparten un mismo request/encode
+batcher = EmbeddingBatcher(provider.embed, max_size=provider.max_batch)
 
-def get_embedding(text: str) -> list[float]:
-    if PROVIDER != "voyage":
-        raise RuntimeError("Embedding provider not supported")
 
-    response = client.embed(
-        texts=[text],
-        model=EMBEDDING_MODEL_NAME
-    )
+async def warmup_embeddings():
+    """Se llama en el startup de FastAPI (carga el modelo local si aplica)."""
+    await provider.warmup()
 
-    return response.embeddings[0]
+
+async def get_embedding(text: str) -> list[float]:
+    # Perfil sin cambios => mismo texto => sin llamar al proveedor
+    cached = await embedding_cache.get(text)
+    if cached is not None:
+        return cached
+
+    embedding = await batcher.embed(text)
+    await embedding_cache.set(text, embedding)
+    return embedding
+
+
+async def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Embeddings de varios textos (mismo orden). El caché se consulta y se
+    completa en un round-trip a Redis cada uno; los faltantes se embeben
+    en lotes de provider.max_batch.
+    """
+    results = await embedding_cache.get_many(texts)
+    missing = list(dict.fromkeys(
+        text for text, emb in zip(texts, results) if emb is None
+    ))
+
+    embedded = {}
+    for i in range(0, len(missing), provider.max_batch):
+        chunk = missing[i:i + provider.max_batch]
+        embedded.update(zip(chunk, await provider.embed(chunk)))
+    await embedding_cache.set_many(embedded)
+
+    return [emb if emb is not None else embedded[text] for text, emb in zip(texts, results)]
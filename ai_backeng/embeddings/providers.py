@@ -0,0 +1,106 @@
+import os
+from dotenv import load_dotenv
+from ai_backeng.concurrency import run_blocking
+
+load_dotenv()
+
+# Solo para backends locales: "torch" (default) u "onnx"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Archivo ONNX dentro del repo del modelo, p. ej. "onnx/model_qint8_avx512.onnx"
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")
+
+
+class VoyageProvider:
+    """Embeddings vía API de Voyage (requiere red y VOYAGE_API_KEY)."""
+
+    name = "voyage"
+    model_name = "voyage-4-lite"
+    max_batch = 128
+
+    def __init__(self):
+        import voyageai
+
+        api_key = os.getenv("VOYAGE_API_KEY")
+        if not api_key:
+            raise RuntimeError("VOYAGE_API_KEY not set in .env")
+
+        # Cliente async: la llamada de red no bloquea el event loop
+        self.client = voyageai.AsyncClient(api_key=api_key)
+
+    async def warmup(self):
+        pass
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        response = await self.client.embed(
+            texts=texts,
+            model=self.model_name
+        )
+        return response.embeddings
+
+
+class LocalProvider:
+    """
+    Modelo SentenceTransformer en CPU, sin salto de red.
+    El encode corre en el executor acotado para no bloquear el event loop.
+    """
+
+    max_batch = 64
+
+    def __init__(self, name: str, model_name: str, query_prefix: str = ""):
+        self.name = name
+        self.model_name = model_name
+        # E5 distingue "query: " (usuario) de "passage: " (carreras)
+        self.query_prefix = query_prefix
+        self.model = None
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        kwargs = {"device": "cpu"}
+        if EMBEDDING_BACKEND == "onnx":
+            kwargs["backend"] = "onnx"
+            if EMBEDDING_ONNX_FILE:
+                kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_FILE}
+
+        return SentenceTransformer(self.model_name, **kwargs)
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        if self.model is None:
+            self.model = self._load()
+
+        embeddings = self.model.encode(
+            [self.query_prefix + t for t in texts],
+            batch_size=self.max_batch,
+            normalize_embeddings=True
+        )
+        return embeddings.tolist()
+
+    async def warmup(self):
+        # Carga el modelo y hace un encode para no pagarlo en el primer request
+        await run_blocking(self._encode, ["warmup"])
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return await run_blocking(self._encode, texts)
+
+
+PROVIDERS = {
+    "voyage": VoyageProvider,
+    "local-e5": lambda: LocalProvider(
+        "local-e5", "intfloat/multilingual-e5-large", query_prefix="query: "
+    ),
+    "local-e5-small": lambda: LocalProvider(
+        "local-e5-small", "intfloat/multilingual-e5-small", query_prefix="query: "
+    ),
+    "local-minilm": lambda: LocalProvider(
+        "local-minilm", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    ),
+}
+
+
+def create_provider(name: str):
+    if name not in PROVIDERS:
+        raise RuntimeError(
+            f"Embedding provider '{name}' not supported "
+            f"(opciones: {', '.join(PROVIDERS)})"
+        )
+    return PROVIDERS[name]()
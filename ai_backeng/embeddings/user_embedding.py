@@ -1,5 +1,5 @@
 from ai_backeng.embeddings.embedding_provider import get_embedding
 
-def embed_user_text(text: str) -> list[float]:
+async def embed_user_text(text: str) -> list[float]:
     text = f"query: {text}"
-    return get_embedding(text)
+    return await get_embedding(text)
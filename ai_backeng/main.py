@@ -1,34 +1,25 @@
-from fastapi import FastAPI, Depends
+from uuid import uuid4
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from datetime import datetime, timezone
 from ai_backeng.db.postgres import init_db, get_pool
-from ai_backeng.embeddings.embedding_provider import get_embedding
-from ai_backeng.embeddings.blend import blend_embeddings
-from ai_backeng.matching.get_best_careers import get_best_careers
-from ai_backeng.agent import run_agent, run_agent_stream, build_user_embedding_text
-from ai_backeng.memory.redis_manager import SessionManager
-from ai_backeng.memory.extractor import extract_profile_updates
-from ai_backeng.memory.tiempo import should_greet_user
+from ai_backeng.db.queries import fetch
+from ai_backeng.db.redis_client import init_redis, close_redis
+from ai_backeng.concurrency import shutdown_executor
+from ai_backeng.http_client import close_http_client
+from ai_backeng.embeddings.embedding_provider import warmup_embeddings
+from ai_backeng.rerank.reranker import warmup_reranker
+from ai_backeng.matching.vector_index import career_index
+from ai_backeng.matching.signal_index import signal_index
+from ai_backeng.matching.catalog import career_catalog, public_fields
+from ai_backeng.memory.redis_manager import RECOMMENDATIONS_CAP, SessionManager
+from ai_backeng.conversation import ConversationTurn
+from ai_backeng.streaming import (
+    STREAM_HEADERS, StreamTimings, text_chat_stream, sse_turn, sse_chat_stream
+)
 from ai_backeng.routers import careers
-from uuid import UUID
-
-
-def now():
-    return datetime.now(timezone.utc)
-
-def now_iso():
-    return datetime.now(timezone.utc).isoformat()
-
-def normalize_for_json(obj):
-    if isinstance(obj, dict):
-        return {k: normalize_for_json(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [normalize_for_json(v) for v in obj]
-    if isinstance(obj, UUID):
-        return str(obj)
-    return obj
+from ai_backeng import metrics
 
 
 app = FastAPI()
@@ -72,62 +63,92 @@ class ChatInput(BaseModel):
 @app.on_event("startup")
 async def startup():
     await init_db()
+    await init_redis()
+
+    # Índice en memoria de carreras (si falla, el matching usa pgvector)
+    pool = await get_pool()
+    try:
+        await career_index.load(pool)
+        await career_index.listen(pool)
+    except Exception as e:
+        print(f"⚠ Índice de carreras no disponible, se usa pgvector: {e}")
+
+    # Catálogo (documentos/prompts armados) y centroides de habilidades/materias:
+    # si faltan, el matching consulta Postgres o omite esa señal
+    for target in (career_catalog, signal_index):
+        try:
+            await target.load(pool)
+        except Exception as e:
+            print(f"⚠ {type(target).__name__} no disponible: {e}")
+        career_index.dependents.append(target)
+
+    await warmup_embeddings()
+    await warmup_reranker()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await career_index.close()
+    await close_redis()
+    await close_http_client()
+    shutdown_executor()
 
 app.include_router(careers.router)
 
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+@app.get("/metrics/requests/{request_id}")
+async def get_request_metrics(request_id: str):
+    data = metrics.get_request(request_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Request no encontrado")
+    return data
+
 @app.post("/reset-session")
 async def reset_session(user_id: str):
-    session_manager.delete(user_id)
+    await session_manager.delete(user_id)
     return {"status": "ok"}
 
-@app.get("/users/{user_id}/recommendations")
-def get_user_recommendations(user_id: str):
-    user_memory = session_manager.get_profile(user_id)
-
-    print("#################################################################################")
-    print(user_memory)
-    print("#################################################################################")
-
-    print("🧠 USER MEMORY COMPLETA:")
-    print(user_memory)
+def recommendations_page(limit: int, offset: int) -> tuple[int, int]:
+    """(limit, offset) efectivos: el historial guarda a lo sumo RECOMMENDATIONS_CAP."""
+    return min(max(limit, 0), RECOMMENDATIONS_CAP), max(offset, 0)
 
-    recommendations = user_memory.get("recomendaciones", [])
 
-    print("⭐ RECOMENDACIONES EXTRAÍDAS:")
-    print(recommendations)
+@app.get("/users/{user_id}/recommendations")
+async def get_user_recommendations(user_id: str, limit: int = 20, offset: int = 0):
+    # Historial paginado (más recientes primero), sin cargar la sesión
+    limit, offset = recommendations_page(limit, offset)
+    total, recommendations = await session_manager.get_recommendations(user_id, offset, limit)
 
     return {
         "user_id": user_id,
-        "recommendations": recommendations
+        "recommendations": recommendations,
+        "total": total,
+        "limit": limit,
+        "offset": offset
     }
 
 
 @app.get("/users/{user_id}/recommendations/full")
-async def get_user_recommendations_full(user_id: str):
+async def get_user_recommendations_full(user_id: str, limit: int = 20, offset: int = 0):
     pool = await get_pool()
-    user_memory = session_manager.get_profile(user_id)
-    recs = user_memory.get("recomendaciones", [])
+    limit, offset = recommendations_page(limit, offset)
+    total, recs = await session_manager.get_recommendations(user_id, offset, limit)
 
     if not recs:
-        return {"recommendations": []}
+        return {"recommendations": [], "total": total, "limit": limit, "offset": offset}
 
     career_ids = [r["career_id"] for r in recs if r.get("career_id")]
 
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("""
-            SELECT
-                c.id AS career_id,
-                c.career_name,
-                c.description,
-                c.modality,
-                c.duration,
-                u.name AS university_name
-            FROM careers c
-            JOIN universities u ON u.id = c.university_id
-            WHERE c.id = ANY($1::uuid[])
-        """, career_ids)
-
-    career_map = {str(r["career_id"]): dict(r) for r in rows}
+    # Datos estáticos desde el catálogo en memoria; Postgres solo para faltantes
+    found, missing = career_catalog.lookup(career_ids)
+    career_map = {str(cid): public_fields(record) for cid, record in found.items()}
+
+    if missing:
+        async with pool.acquire() as conn:
+            rows = await fetch(conn, "recommendations_full", missing)
+        career_map.update({str(r["career_id"]): dict(r) for r in rows})
 
     enriched = []
     for r in recs:
@@ -138,285 +159,38 @@ async def get_user_recommendations_full(user_id: str):
             "timestamp": r["timestamp"]
         })
 
-    return {"recommendations": enriched}
+    return {"recommendations": enriched, "total": total, "limit": limit, "offset": offset}
 
 
 @app.post("/chat")
 async def chat(input: ChatInput):
-    pool = await get_pool()
-
-    # 1. Recuperamos memoria de Redis
-    user_memory = session_manager.get_profile(input.user_id)
-    meta = user_memory.setdefault("meta", {})
-
-    # 2. Decidimos saludo ANTES de tocar timestamps
-    should_greet = should_greet_user(meta)
-    if should_greet:
-        meta["last_greeted_at"] = now().isoformat()
-
-    # 3. Extractor
-    extraction_result = extract_profile_updates(input.message, user_memory)
-    profile_update = extraction_result["profile_data"]
-    should_update_embedding = extraction_result["has_career_intent"]
-
-    # 4. Fusionamos memoria existente con lo nuevo
-    # Nombre
-    if profile_update.get("nombre"):
-        user_memory["nombre"] = profile_update["nombre"]
-
-    # Preferencias
-    for key, value in profile_update.get("preferencias", {}).items():
-        if value:
-            user_memory.setdefault("preferencias", {})[key] = value
-
-    # Habilidades percibidas
-    if profile_update.get("habilidades_percibidas"):
-        user_memory["habilidades_percibidas"] = list(
-            set(user_memory.get("habilidades_percibidas", []) +
-                profile_update.get("habilidades_percibidas", []))
-        )
-
-    # Materias fuertes
-    if profile_update.get("materias_fuertes"):
-        user_memory["materias_fuertes"] = list(
-            set(user_memory.get("materias_fuertes", []) +
-                profile_update.get("materias_fuertes", []))
-        )
-
-    # Materias débiles
-    if profile_update.get("materias_debiles"):
-        user_memory["materias_debiles"] = list(
-            set(user_memory.get("materias_debiles", []) +
-                profile_update.get("materias_debiles", []))
-        )
-
-        # Limpiar intereses que el usuario no quiere
-        for materia in profile_update.get("materias_debiles", []):
-            if materia in user_memory.get("intereses", []):
-                user_memory["intereses"].remove(materia)
-
-    # Intereses
-    if profile_update.get("intereses"):
-        user_memory["intereses"] = list(
-            set(user_memory.get("intereses", []) +
-                profile_update.get("intereses", []))
-        )
-
-    # 5. Actualizamos meta
-    meta["last_seen_at"] = now().isoformat()
-    meta["message_count"] = meta.get("message_count", 0) + 1
-
-    # 6. Embeddings
-    if should_update_embedding:
-        profile_text = build_user_embedding_text(user_memory)
-        new_emb = get_embedding(profile_text)
-        current_emb = user_memory.get("user_embedding")
-        user_memory["user_embedding"] = (
-            blend_embeddings(current_emb, new_emb) if current_emb else new_emb
-        )
-
-    # 7. Matching de carreras
-    # 7. Matching de carreras
-    careers = []
-
-    if user_memory.get("user_embedding"):
-        enriched_preferences = {
-            **user_memory.get("preferencias", {}),
-            "intereses": user_memory.get("intereses", []),
-            "habilidades_percibidas": user_memory.get("habilidades_percibidas", []),
-            "materias_fuertes": user_memory.get("materias_fuertes", [])
-        }
-
-        careers = await get_best_careers(
-            pool,
-            user_memory["user_embedding"],
-            enriched_preferences
-        )
-
-        # 7.1 Guardar recomendaciones en Redis
-        if careers:
-            user_memory.setdefault("recomendaciones", [])
+    turn = await ConversationTurn(input.user_id, input.message, session_manager).prepare()
+    reply = await turn.reply()
 
-            for c in careers:
-                rec = {
-                    "career_id": c.get("career_id"),
-                    "career_name": c.get("career_name"),
-                    "university_id": c.get("university_id"),
-                    "university_name": c.get("university_name"),
-                    "timestamp": now_iso(),
-                    "context": input.message,
-                    "score": c.get("score")
-                }
-
-                if not any(
-                    r.get("career_id") == rec["career_id"]
-                    for r in user_memory["recomendaciones"]
-                    if r.get("career_id") is not None
-                ):
-                    user_memory["recomendaciones"].append(rec)
-
-
-
-    print("Rerank query context:", enriched_preferences)
-
-
-
-
-    # 8. Respuesta del agente
-    reply = run_agent(
-        input.message,
-        user_memory,
-        careers,
-        should_greet=should_greet
-    )
-
-    # 9. Persistimos sesión (ya guardamos saludo arriba)
-    user_memory = normalize_for_json(user_memory)
-    session_manager.save_profile(input.user_id, user_memory)
+    print("⏱ Turno /chat:", turn.finish())
 
     return {"reply": reply}
 
 @app.post("/chat/stream")
-async def chat_stream(input: ChatInput):
-    pool = await get_pool()
-
-    # 1. Recuperamos memoria
-    user_memory = session_manager.get_profile(input.user_id)
-    meta = user_memory.setdefault("meta", {})
-
-    # 2. Decidimos saludo ANTES de tocar timestamps
-    should_greet = should_greet_user(meta)
-    if should_greet:
-        meta["last_greeted_at"] = now().isoformat()  # Guardamos inmediatamente
-
-    # 3. Extractor
-    extraction_result = extract_profile_updates(input.message, user_memory)
-    profile_update = extraction_result["profile_data"]
-    should_update_embedding = extraction_result["has_career_intent"]
-
-    # 4. Fusionamos memoria existente con lo nuevo
-
-    # Nombre
-    if profile_update.get("nombre"):
-        user_memory["nombre"] = profile_update["nombre"]
-
-    # Preferencias (aceptamos False)
-    for key, value in profile_update.get("preferencias", {}).items():
-        if value is not None:
-            user_memory.setdefault("preferencias", {})[key] = value
-
-    # Habilidades percibidas
-    if profile_update.get("habilidades_percibidas"):
-        user_memory["habilidades_percibidas"] = list(
-            set(user_memory.get("habilidades_percibidas", []) +
-                profile_update.get("habilidades_percibidas", []))
-        )
-
-    # Materias fuertes
-    if profile_update.get("materias_fuertes"):
-        user_memory["materias_fuertes"] = list(
-            set(user_memory.get("materias_fuertes", []) +
-                profile_update.get("materias_fuertes", []))
-        )
-
-    # Materias débiles
-    if profile_update.get("materias_debiles"):
-        user_memory["materias_debiles"] = list(
-            set(user_memory.get("materias_debiles", []) +
-                profile_update.get("materias_debiles", []))
-        )
-        # Limpiar intereses que el usuario no quiere
-        for materia in profile_update.get("materias_debiles", []):
-            if materia in user_memory.get("intereses", []):
-                user_memory["intereses"].remove(materia)
-
-    # Intereses
-    if profile_update.get("intereses"):
-        user_memory["intereses"] = list(
-            set(user_memory.get("intereses", []) +
-                profile_update.get("intereses", []))
-        )
-
-    # 5. Actualizamos meta
-    meta["last_seen_at"] = now().isoformat()
-    meta["message_count"] = meta.get("message_count", 0) + 1
-
-    # 6. Embeddings
-    if should_update_embedding:
-        profile_text = build_user_embedding_text(user_memory)
-        new_emb = get_embedding(profile_text)
-        current_emb = user_memory.get("user_embedding")
-        user_memory["user_embedding"] = (
-            blend_embeddings(current_emb, new_emb) if current_emb else new_emb
+async def chat_stream(input: ChatInput, request: Request, format: str = "text"):
+    request_id = uuid4().hex
+    timings = StreamTimings(request_id)
+    headers = {"X-Request-Id": request_id, **STREAM_HEADERS}
+
+    # Modo SSE: ?format=sse o Accept: text/event-stream
+    if format == "sse" or "text/event-stream" in request.headers.get("accept", ""):
+        turn, queue = sse_turn(input.user_id, input.message, session_manager)
+        return StreamingResponse(
+            sse_chat_stream(turn, queue, timings),
+            media_type="text/event-stream",
+            headers=headers
         )
 
-    # 7. Matching de carreras
-    careers = []
-
-    if user_memory.get("user_embedding"):
-        enriched_preferences = {
-            **user_memory.get("preferencias", {}),
-            "intereses": user_memory.get("intereses", []),
-            "habilidades_percibidas": user_memory.get("habilidades_percibidas", []),
-            "materias_fuertes": user_memory.get("materias_fuertes", [])
-        }
-
-        careers = await get_best_careers(
-            pool,
-            user_memory["user_embedding"],
-            enriched_preferences
-        )
-
-        # 7.1 Guardar recomendaciones en Redis
-        if careers:
-            user_memory.setdefault("recomendaciones", [])
-
-            for c in careers:
-                rec = {
-                    "career_id": c.get("career_id"),
-                    "career_name": c.get("career_name"),
-                    "university_id": c.get("university_id"),
-                    "university_name": c.get("university_name"),
-                    "timestamp": now_iso(),
-                    "context": input.message,
-                    "score": c.get("score")
-                }
-
-                if not any(
-                    r.get("career_id") == rec["career_id"]
-                    for r in user_memory["recomendaciones"]
-                    if r.get("career_id") is not None
-                ):
-                    user_memory["recomendaciones"].append(rec)
-
-
-
-    def generator():
-        has_content = False
-
-        # 1️⃣ Iteramos los chunks del modelo
-        for chunk in run_agent_stream(input.message, user_memory, careers, should_greet):
-            for candidate in chunk.candidates:
-                for part in candidate.content.parts:
-                    if part.text.strip():   # ignoramos strings vacíos
-                        has_content = True
-                        yield part.text
-
-        # 2️⃣ Fallback si no hubo contenido
-        if not has_content:
-            yield "Lo siento, no pude generar una respuesta en este momento.\n"
-
-        # 3️⃣ Guardamos la memoria del usuario **al final del streaming**
-        safe_memory = normalize_for_json(user_memory)
-        session_manager.save_profile(input.user_id, safe_memory)
-
-        # 4️⃣ Marcamos fin de la transmisión
-        yield "\n[END]\n"
-    
-
+    turn = ConversationTurn(input.user_id, input.message, session_manager)
     return StreamingResponse(
-        generator(),
-        media_type="text/plain"
+        text_chat_stream(turn, timings),
+        media_type="text/plain",
+        headers=headers
     )
 
 # --- RUTA DE EMERGENCIA PARA UNIVERSIDADES ---
@@ -429,11 +203,8 @@ async def get_universities(
     offset = (page - 1) * limit
 
     # 1. Consulta REAL a la Base de Datos
-    rows = await pool.fetch("""
-        SELECT * FROM universities 
-        ORDER BY id 
-        LIMIT $1 OFFSET $2
-    """, limit, offset)
+    async with pool.acquire() as conn:
+        rows = await fetch(conn, "universities_page", limit, offset)
 
     results = []
     for r in rows:
@@ -0,0 +1,83 @@
+# ai_backeng/matching/catalog.py
+
+from ai_backeng.agent import format_career
+from ai_backeng.rerank.documents import build_rerank_document
+
+# Mismas columnas que careers_by_id / recall_pgvector (sin embedding)
+CATALOG_QUERY = """
+    SELECT
+        c.id AS career_id,
+        c.career_name,
+        c.description,
+        c.modality,
+        c.duration,
+        c.university_id,
+        u.name AS university_name
+    FROM careers c
+    JOIN universities u ON u.id = c.university_id
+"""
+
+# Textos derivados que se arman una sola vez al cargar
+DERIVED_FIELDS = ("document", "prompt_snippet")
+
+
+def _record(row) -> dict:
+    record = dict(row)
+    record["document"] = build_rerank_document(record)
+    record["prompt_snippet"] = format_career(record)
+    return record
+
+
+def public_fields(record: dict) -> dict:
+    """El registro sin los textos derivados (para respuestas de la API)."""
+    return {k: v for k, v in record.items() if k not in DERIVED_FIELDS}
+
+
+class CareerCatalog:
+    """
+    Catálogo de carreras en memoria: career_id → registro compacto con el
+    documento del rerank y el fragmento del prompt ya armados. Los datos son
+    estáticos entre cargas; se recarga junto al índice (careers_changed).
+    Las claves son str(career_id): sirven igual para UUID de asyncpg y para
+    los ids ya serializados de la sesión.
+    """
+
+    def __init__(self):
+        self.records: dict[str, dict] = {}
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.records)
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(CATALOG_QUERY)
+
+        # Swap atómico, igual que el índice de carreras
+        self.records = {str(r["career_id"]): _record(r) for r in rows}
+        print(f"✔ Catálogo de carreras cargado: {len(rows)} carreras")
+
+    def get(self, career_id) -> dict | None:
+        return self.records.get(str(career_id))
+
+    def lookup(self, career_ids) -> tuple[dict, list]:
+        """(career_id → registro) de los que están y la lista de los que faltan."""
+        records = self.records
+        found, missing = {}, []
+        for cid in career_ids:
+            record = records.get(str(cid))
+            if record is None:
+                missing.append(cid)
+            else:
+                found[cid] = record
+        return found, missing
+
+    def enrich(self, career: dict) -> dict:
+        """Copia de una fila de Postgres con los textos derivados del catálogo."""
+        record = self.get(career["career_id"])
+        if record is None:
+            return dict(career)
+        return {**record, **career}
+
+
+career_catalog = CareerCatalog()
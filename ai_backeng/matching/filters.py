@@ -0,0 +1,41 @@
+# ai_backeng/matching/filters.py
+
+import unicodedata
+from ai_backeng.agent import normalize_modality
+
+
+def normalize_key(text) -> str | None:
+    """Minúsculas, sin tildes ni espacios extra (igual que normalize_key del loader)."""
+    if not text:
+        return None
+    text = " ".join(str(text).lower().split())
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text)
+        if unicodedata.category(c) != "Mn"
+    ) or None
+
+
+def university_type_filter(universidad_publica) -> str | None:
+    if universidad_publica is True:
+        return "publica"
+    if universidad_publica is False:
+        return "privada"
+    return None
+
+
+def build_recall_filters(preferences: dict) -> dict:
+    """Predicados que se aplican DENTRO del recall vectorial."""
+    return {
+        "modality": normalize_modality(preferences.get("modalidad")),
+        "city": normalize_key(preferences.get("ciudad")),
+        "university_type": university_type_filter(preferences.get("universidad_publica")),
+    }
+
+
+def relax_filters(filters: dict) -> dict:
+    """Si los filtros dejan muy pocos candidatos se conserva solo la modalidad."""
+    return {**filters, "city": None, "university_type": None}
+
+
+def has_relaxable_filters(filters: dict) -> bool:
+    return bool(filters.get("city") or filters.get("university_type"))
@@ -0,0 +1,19 @@
+# ai_backeng/matching/fusion.py
+
+import os
+
+# Constante de Reciprocal Rank Fusion (60 es el valor habitual)
+RRF_K = int(os.getenv("RRF_K", 60))
+
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = RRF_K) -> list[tuple]:
+    """
+    Fusiona rankings (listas de ids, el mejor primero) sumando 1 / (k + posición).
+    Devuelve (id, score) ordenado de mayor a menor; solo usa posiciones,
+    así que no importa que los scores de cada ranking no sean comparables.
+    """
+    fused: dict = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
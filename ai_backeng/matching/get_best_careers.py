@@ -1,48 +1,177 @@
 # ai_backeng/matching/get_best_careers.py
 
-from ai_backeng.db.vector import to_pgvector
-from ai_backeng.agent import normalize_modality, build_user_embedding_text
-from ai_backeng.rerank.voyage_rerank import rerank_careers
+import asyncio
+import os
+from ai_backeng.db.queries import fetch
+from ai_backeng import metrics
+from ai_backeng.agent import build_user_embedding_text
+from ai_backeng.matching.filters import (
+    build_recall_filters, relax_filters, has_relaxable_filters
+)
+from ai_backeng.matching.vector_index import career_index
+from ai_backeng.matching.catalog import career_catalog
+from ai_backeng.matching.lexical import build_lexical_query, recall_lexical
+from ai_backeng.matching.fusion import reciprocal_rank_fusion
+from ai_backeng.matching.merge_scores import merge_scores
+from ai_backeng.matching.signal_index import signal_index
+from ai_backeng.matching.policy import choose_recall_k, rerank_plan
+from ai_backeng.matching.recording import record_matching
+from ai_backeng.rerank.reranker import rerank_careers
 
-async def get_best_careers(
+# Candidatos (tras la fusión vectorial + léxica) que se envían al rerank
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))
+
+
+async def recall_careers(pool, user_embedding, recall_k, filters):
+    """Top recall_k carreras (que cumplen los filtros) por similitud, ordenadas por score."""
+    if not career_index.ready:
+        async with pool.acquire() as conn:
+            rows = await fetch(
+                conn,
+                "recall_pgvector",
+                user_embedding,  # codec binario del pool
+                recall_k,
+                filters["modality"],
+                filters["city"],
+                filters["university_type"]
+            )
+        return [career_catalog.enrich(r) for r in rows]
+
+    scores = dict(career_index.search(user_embedding, recall_k, filters))
+    if not scores:
+        return []
+
+    # Los datos de cada carrera salen del catálogo en memoria; a Postgres
+    # solo se piden las que falten (p. ej. antes de su primera carga)
+    found, missing = career_catalog.lookup(scores)
+    if missing:
+        metrics.incr("catalog.misses", len(missing))
+        async with pool.acquire() as conn:
+            rows = await fetch(conn, "careers_by_id", missing)
+        found.update({r["career_id"]: dict(r) for r in rows})
+
+    careers = [{**found[cid], "score": score} for cid, score in scores.items() if cid in found]
+    careers.sort(key=lambda c: c["score"], reverse=True)
+    return careers
+
+
+async def hybrid_recall(pool, user_embedding, lexical_query, recall_k, filters):
+    """
+    Recall vectorial y léxico en paralelo (cada uno con su conexión).
+    Devuelve los candidatos por id y los dos rankings (ids) para fusionar.
+    """
+    async def lexical():
+        if not lexical_query:
+            return []
+        async with pool.acquire() as conn:
+            return await recall_lexical(conn, lexical_query, recall_k, filters)
+
+    vector_hits, lexical_hits = await asyncio.gather(
+        recall_careers(pool, user_embedding, recall_k, filters), lexical()
+    )
+
+    # El score vectorial manda si la carrera salió en ambos
+    by_id = {c["career_id"]: career_catalog.enrich(c) for c in lexical_hits}
+    by_id.update({c["career_id"]: c for c in vector_hits})
+
+    vector_ids = [c["career_id"] for c in vector_hits]
+    lexical_ids = [c["career_id"] for c in lexical_hits]
+    return by_id, [vector_ids, lexical_ids]
+
+
+def signal_ranking(candidates: dict, profile) -> list:
+    """
+    Ranking por habilidades + materias (centroides en memoria) combinadas con
+    el score de la carrera vía merge_scores. Anota los scores en cada candidato.
+    """
+    skill_scores, subject_scores = signal_index.scores(profile, candidates)
+    merged = merge_scores(
+        skill_scores,
+        subject_scores,
+        # Solo léxico: sin score vectorial, cuentan solo sus centroides
+        {cid: c["score"] for cid, c in candidates.items() if c.get("score") is not None}
+    )
+
+    for cid, c in candidates.items():
+        c["skill_score"] = skill_scores.get(cid)
+        c["subject_score"] = subject_scores.get(cid)
+        c["match_score"] = merged.get(cid, 0.0)
+
+    return sorted(candidates, key=lambda cid: candidates[cid]["match_score"], reverse=True)
+
+
+async def recall_candidates(
     pool,
     user_embedding,
     preferences,
-    recall_k: int = 40,
+    recall_k: int | None = None,
     final_k: int = 5
-):
-    async with pool.acquire() as conn:
-        user_vec = to_pgvector(user_embedding)
-        modality_filter = normalize_modality(preferences.get("modalidad"))
-
-        query = """
-        SELECT
-            c.id AS career_id,
-            c.career_name,
-            c.description,
-            c.modality,
-            c.duration,
-            c.university_id,
-            u.name AS university_name,
-            m.score
-        FROM match_careers_by_embedding($1::vector, $2) m
-        JOIN careers c ON c.id = m.career_id
-        JOIN universities u ON u.id = c.university_id
-        WHERE ($3::text IS NULL OR lower(unaccent(c.modality)) = $3)
-        ORDER BY m.score DESC
-        LIMIT $2;
-
-        """
-
-        rows = await conn.fetch(
-            query,
-            user_vec,
-            recall_k,
-            modality_filter
+) -> dict:
+    """
+    Solo el recall (vectorial + léxico, con filtros). No llama servicios de
+    pago ni registra métricas: se puede correr de forma especulativa y
+    descartar. Las métricas se registran en rank_candidates.
+    """
+    # Modalidad, ciudad y tipo de universidad se filtran dentro del recall:
+    # los recall_k candidatos ya cumplen las preferencias
+    filters = build_recall_filters(preferences)
+    lexical_query = build_lexical_query(preferences)
+    k = recall_k or choose_recall_k(career_index.count(filters))
+
+    candidates, rankings = await hybrid_recall(pool, user_embedding, lexical_query, k, filters)
+
+    # Ciudad/tipo demasiado restrictivos: se relajan antes que recomendar de menos
+    relaxed = False
+    if len(candidates) < final_k and has_relaxable_filters(filters):
+        relaxed = True
+        filters = relax_filters(filters)
+        k = recall_k or choose_recall_k(career_index.count(filters))
+        candidates, rankings = await hybrid_recall(
+            pool, user_embedding, lexical_query, k, filters
         )
 
-        careers = [dict(r) for r in rows]
+    return {
+        "filters": filters,
+        "recall_k": k,
+        "relaxed": relaxed,
+        "candidates": candidates,
+        "rankings": rankings,
+    }
+
+
+async def rank_candidates(
+    recall: dict,
+    preferences,
+    profile,
+    final_k: int = 5,
+    deadline=None
+):
+    """
+    Señales de habilidades/materias, fusión RRF, rerank y grabación sobre un
+    recall ya confirmado. profile: embeddings de signal_index.embed_profile.
+    """
+    candidates, rankings = recall["candidates"], list(recall["rankings"])
+
+    if recall["relaxed"]:
+        metrics.incr("recall.relaxed_filters")
+    metrics.incr("recall.lexical_only", len(candidates) - len(rankings[0]))
+
+    if profile is not None and candidates:
+        rankings.append(signal_ranking(candidates, profile))
+
+    # Fusión RRF; solo los mejores pasan al rerank (remoto y de pago)
+    careers = [
+        {**candidates[cid], "rrf_score": score}
+        for cid, score in reciprocal_rank_fusion(rankings)
+    ][:RERANK_CANDIDATES]
+
+    # Margen claro entre el top-k y el resto => sin rerank o con menos candidatos
+    decision, to_rerank = rerank_plan(careers, final_k)
+    metrics.incr(f"rerank.{decision}")
 
+    if decision == "skip":
+        reranked = to_rerank
+    else:
         # 🔥 RERANK SEMÁNTICO
         user_query = build_user_embedding_text({
             "intereses": preferences.get("intereses", []),
@@ -50,10 +179,36 @@ async def get_best_careers(
             "materias_fuertes": preferences.get("materias_fuertes", [])
         })
 
-        reranked = rerank_careers(
+        reranked = await rerank_careers(
             user_query=user_query,
-            careers=careers,
-            top_k=final_k
+            careers=to_rerank,
+            top_k=final_k,
+            deadline=deadline
         )
 
-        return reranked
+    await record_matching(
+        preferences, recall["filters"], recall["recall_k"], careers, decision, reranked
+    )
+    return reranked
+
+
+async def rank_recalled(recall: dict, preferences, final_k: int = 5, deadline=None):
+    """Completa un recall hecho antes (p. ej. el especulativo) ya validado."""
+    profile = await signal_index.embed_profile(preferences)
+    return await rank_candidates(recall, preferences, profile, final_k, deadline)
+
+
+async def get_best_careers(
+    pool,
+    user_embedding,
+    preferences,
+    recall_k: int | None = None,
+    final_k: int = 5,
+    deadline=None
+):
+    # Los embeddings de habilidades/materias se piden mientras corre el recall
+    recall, profile = await asyncio.gather(
+        recall_candidates(pool, user_embedding, preferences, recall_k, final_k),
+        signal_index.embed_profile(preferences)
+    )
+    return await rank_candidates(recall, preferences, profile, final_k, deadline)
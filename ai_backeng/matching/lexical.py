@@ -0,0 +1,46 @@
+# ai_backeng/matching/lexical.py
+
+import asyncpg
+from ai_backeng.db.queries import fetch
+from ai_backeng import metrics
+from ai_backeng.matching.filters import normalize_key
+
+# Campos del perfil que suelen nombrar la carrera o sus materias tal cual
+LEXICAL_FIELDS = ("intereses", "materias_fuertes")
+
+
+def build_lexical_query(preferences: dict) -> str | None:
+    """
+    Términos del perfil en sintaxis de websearch_to_tsquery: cada término
+    entre comillas (frase) y unidos con "or". Sin tildes, como search_tsv.
+    """
+    terms = set()
+    for field in LEXICAL_FIELDS:
+        for value in preferences.get(field) or []:
+            term = normalize_key(str(value).replace('"', " "))
+            if term:
+                terms.add(term)
+
+    if not terms:
+        return None
+    return " or ".join(f'"{t}"' for t in sorted(terms))
+
+
+async def recall_lexical(conn, lexical_query, recall_k, filters):
+    """Top recall_k carreras por coincidencia de texto (ts_rank_cd)."""
+    try:
+        rows = await fetch(
+            conn,
+            "recall_lexical",
+            lexical_query,
+            recall_k,
+            filters["modality"],
+            filters["city"],
+            filters["university_type"]
+        )
+    except asyncpg.PostgresError as e:
+        # Sin search_tsv (loader antiguo): el recall sigue solo con vectores
+        metrics.incr("recall.lexical_errors")
+        print(f"⚠ Recall léxico no disponible: {e}")
+        return []
+    return [dict(r) for r in rows]
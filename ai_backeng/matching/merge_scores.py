@@ -1,12 +1,44 @@
 # ai_backeng/matching/merge_scores.py
 
-def merge_scores(skill_scores, subject_scores, w_skills=0.7, w_subjects=0.6):
+# Peso de cada señal del candidato (mismos defaults que merge_scores)
+SIGNAL_WEIGHTS = {"skill_score": 0.7, "subject_score": 0.6, "score": 1.0}
+
+
+def weighted_mean(values: dict, weights: dict = SIGNAL_WEIGHTS) -> float | None:
+    """
+    Promedio ponderado solo sobre las señales presentes (None = falta).
+    Queda en la escala de la similitud coseno, sin importar cuántas haya.
+    """
+    total, weight = 0.0, 0.0
+    for key, w in weights.items():
+        value = values.get(key)
+        if value is not None:
+            total += w * value
+            weight += w
+    return total / weight if weight else None
+
+def merge_scores(
+    skill_scores,
+    subject_scores,
+    career_scores=None,
+    w_skills=0.7,
+    w_subjects=0.6,
+    w_career=1.0
+):
+    """
+    Promedio ponderado de las señales que tiene cada carrera: una carrera sin
+    centroide de habilidades o materias (o sin score vectorial) se mide con
+    las demás en lugar de contar la que falta como 0.
+    """
+    career_scores = career_scores or {}
+    weights = {"skill_score": w_skills, "subject_score": w_subjects, "score": w_career}
     final = {}
 
-    for cid in set(skill_scores) | set(subject_scores):
-        final[cid] = (
-            w_skills * skill_scores.get(cid, 0) +
-            w_subjects * subject_scores.get(cid, 0)
-        )
+    for cid in set(skill_scores) | set(subject_scores) | set(career_scores):
+        final[cid] = weighted_mean({
+            "skill_score": skill_scores.get(cid),
+            "subject_score": subject_scores.get(cid),
+            "score": career_scores.get(cid),
+        }, weights)
 
     return final
@@ -0,0 +1,86 @@
+# ai_backeng/matching/policy.py
+"""
+Política adaptativa del matching: cuántos candidatos traer del recall según
+la selectividad de los filtros, y cuándo saltar o achicar el rerank porque
+los scores ya separan claramente el top-k del resto.
+
+Funciones puras (sin I/O) para poder evaluarlas offline con
+benchmarks/adaptive_policy.py sobre turnos grabados.
+"""
+import math
+import os
+
+from ai_backeng.matching.merge_scores import SIGNAL_WEIGHTS, weighted_mean
+
+# recall_k crece con el log de las carreras que cumplen los filtros:
+# RECALL_K_MIN con RECALL_K_MIN elegibles, RECALL_K_MAX desde RECALL_K_SATURATION
+RECALL_K_DEFAULT = int(os.getenv("RECALL_K_DEFAULT", 40))
+RECALL_K_MIN = int(os.getenv("RECALL_K_MIN", 20))
+RECALL_K_MAX = int(os.getenv("RECALL_K_MAX", 60))
+RECALL_K_SATURATION = int(os.getenv("RECALL_K_SATURATION", 2000))
+
+# Diferencia de score (escala coseno, ver ranking_score) entre el k-ésimo
+# y el (k+1)-ésimo candidato:
+# >= SKIP se devuelve el top-k sin rerank; >= SHRINK se rerankea solo
+# el top-k más RERANK_SHRINK_EXTRA candidatos
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", 0.08))
+RERANK_SHRINK_MARGIN = float(os.getenv("RERANK_SHRINK_MARGIN", 0.03))
+RERANK_SHRINK_EXTRA = int(os.getenv("RERANK_SHRINK_EXTRA", 5))
+
+
+def choose_recall_k(eligible: int | None) -> int:
+    """
+    eligible: carreras que cumplen los filtros (None si no se conoce,
+    p. ej. sin índice en memoria). Filtros muy selectivos => se traen todas.
+    """
+    if eligible is None:
+        return RECALL_K_DEFAULT
+    if eligible <= RECALL_K_MIN:
+        return max(eligible, 1)
+    if eligible >= RECALL_K_SATURATION:
+        return RECALL_K_MAX
+    growth = math.log(eligible / RECALL_K_MIN) / math.log(RECALL_K_SATURATION / RECALL_K_MIN)
+    return min(eligible, math.ceil(RECALL_K_MIN + (RECALL_K_MAX - RECALL_K_MIN) * growth))
+
+
+def ranking_score(career: dict) -> float:
+    """
+    Score con el que se mide el margen: promedio ponderado de las señales
+    que tiene el candidato (carrera, habilidades, materias). Queda en escala
+    coseno para todos, falten o no señales, así los márgenes son comparables.
+    """
+    score = weighted_mean({key: career.get(key) for key in SIGNAL_WEIGHTS})
+    return score or 0.0
+
+
+def score_margin(careers: list[dict], top_k: int) -> float | None:
+    """Brecha entre el top-k y el resto (None si no hay resto con qué comparar)."""
+    if len(careers) <= top_k:
+        return None
+    scores = sorted((ranking_score(c) for c in careers), reverse=True)
+    return scores[top_k - 1] - scores[top_k]
+
+
+def rerank_plan(
+    careers: list[dict],
+    top_k: int,
+    skip_margin: float = RERANK_SKIP_MARGIN,
+    shrink_margin: float = RERANK_SHRINK_MARGIN,
+    shrink_extra: int = RERANK_SHRINK_EXTRA
+) -> tuple[str, list[dict]]:
+    """
+    Devuelve (decisión, candidatos):
+    - "skip": el top-k por score, ya es la respuesta.
+    - "shrink": top-k + shrink_extra por score, para rerankear.
+    - "full": todos los candidatos (en su orden) para rerankear.
+    """
+    margin = score_margin(careers, top_k)
+    if margin is None:
+        return "full", careers
+
+    by_score = sorted(careers, key=ranking_score, reverse=True)
+    if margin >= skip_margin:
+        return "skip", by_score[:top_k]
+    if margin >= shrink_margin:
+        return "shrink", by_score[:top_k + shrink_extra]
+    return "full", careers
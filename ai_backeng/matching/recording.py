@@ -0,0 +1,50 @@
+# ai_backeng/matching/recording.py
+
+import json
+import os
+from ai_backeng.concurrency import run_blocking
+
+# JSONL con cada matching (candidatos, scores y decisión de rerank) para
+# evaluar la política offline: python -m benchmarks.adaptive_policy <archivo>
+MATCHING_RECORD_PATH = os.getenv("MATCHING_RECORD_PATH")
+
+
+def _append_line(path: str, line: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+async def record_matching(
+    preferences: dict,
+    filters: dict,
+    recall_k: int,
+    candidates: list[dict],
+    decision: str,
+    result: list[dict]
+):
+    if not MATCHING_RECORD_PATH:
+        return
+
+    entry = {
+        "preferences": preferences,
+        "filters": filters,
+        "recall_k": recall_k,
+        "candidates": [
+            {
+                "career_id": c["career_id"],
+                "score": c.get("score"),
+                "skill_score": c.get("skill_score"),
+                "subject_score": c.get("subject_score"),
+                "match_score": c.get("match_score"),
+                "rrf_score": c.get("rrf_score"),
+            }
+            for c in candidates
+        ],
+        "decision": decision,
+        "result": [c["career_id"] for c in result],
+    }
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    try:
+        await run_blocking(_append_line, MATCHING_RECORD_PATH, line)
+    except OSError as e:
+        print(f"⚠ No se pudo grabar el matching: {e}")
@@ -0,0 +1,114 @@
+# ai_backeng/matching/signal_index.py
+
+import numpy as np
+from ai_backeng import metrics
+from ai_backeng.embeddings.embedding_provider import EMBEDDING_MODEL_NAME, get_embeddings
+from ai_backeng.matching.vector_index import _normalize
+
+# Centroide por carrera de los embeddings de sus habilidades y materias
+# (base_datos/embeddings_skills.py). Solo los del modelo activo: mezclar
+# modelos daría dimensiones o espacios distintos.
+SKILL_CENTROIDS_QUERY = """
+    SELECT cs.career_id, avg(s.embedding) AS centroid
+    FROM career_skills cs
+    JOIN skills s ON s.id = cs.skill_id
+    WHERE s.embedding IS NOT NULL AND s.embedding_model = $1
+    GROUP BY cs.career_id
+"""
+
+SUBJECT_CENTROIDS_QUERY = """
+    SELECT career_id, avg(embedding) AS centroid
+    FROM subjects
+    WHERE embedding IS NOT NULL AND embedding_model = $1
+    GROUP BY career_id
+"""
+
+
+class _CentroidMatrix:
+    """career_id -> fila de una matriz float32 de centroides normalizados."""
+
+    def __init__(self, rows):
+        self.rows = {r["career_id"]: i for i, r in enumerate(rows)}
+        self.matrix = _normalize(np.stack([r["centroid"] for r in rows])) if rows else None
+
+    def scores(self, queries: np.ndarray | None, career_ids) -> dict:
+        """
+        Similitud de cada carrera con el mejor de los textos del usuario:
+        un solo producto matricial (carreras x textos) y máximo por fila.
+        """
+        if self.matrix is None or queries is None or not len(queries):
+            return {}
+        ids = [cid for cid in career_ids if cid in self.rows]
+        if not ids:
+            return {}
+        sims = self.matrix[[self.rows[cid] for cid in ids]] @ queries.T
+        return dict(zip(ids, sims.max(axis=1).tolist()))
+
+
+class CareerSignalIndex:
+    """
+    Centroides de habilidades (career_skills → skills) y de materias por
+    carrera, precalculados en memoria. Se recarga con el índice de carreras.
+    """
+
+    def __init__(self):
+        self.skills: _CentroidMatrix | None = None
+        self.subjects: _CentroidMatrix | None = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(
+            (self.skills and self.skills.rows) or (self.subjects and self.subjects.rows)
+        )
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            skill_rows = await conn.fetch(SKILL_CENTROIDS_QUERY, EMBEDDING_MODEL_NAME)
+            subject_rows = await conn.fetch(SUBJECT_CENTROIDS_QUERY, EMBEDDING_MODEL_NAME)
+
+        # Swap atómico, igual que el índice de carreras
+        self.skills = _CentroidMatrix(skill_rows)
+        self.subjects = _CentroidMatrix(subject_rows)
+        print(
+            f"✔ Centroides cargados: {len(skill_rows)} por habilidades, "
+            f"{len(subject_rows)} por materias"
+        )
+        if not skill_rows and not subject_rows:
+            print(
+                f"⚠ Sin embeddings de habilidades/materias para {EMBEDDING_MODEL_NAME}: "
+                "corre base_datos/embeddings_skills.py con el mismo EMBEDDING_PROVIDER"
+            )
+
+    async def embed_profile(self, preferences: dict) -> tuple | None:
+        """
+        Embeddings de habilidades_percibidas y materias_fuertes en una sola
+        llamada (con caché). Devuelve (habilidades, materias) normalizadas.
+        """
+        if not self.ready:
+            return None
+
+        skills = preferences.get("habilidades_percibidas") or []
+        subjects = preferences.get("materias_fuertes") or []
+        if not skills and not subjects:
+            return None
+
+        try:
+            embeddings = await get_embeddings(skills + subjects)
+        except Exception as e:
+            metrics.incr("signals.embed_errors")
+            print(f"⚠ No se pudieron embeber habilidades/materias: {e}")
+            return None
+
+        matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+        return matrix[:len(skills)], matrix[len(skills):]
+
+    def scores(self, profile: tuple, career_ids) -> tuple[dict, dict]:
+        """(skill_scores, subject_scores) de los candidatos."""
+        skill_queries, subject_queries = profile
+        return (
+            self.skills.scores(skill_queries, career_ids),
+            self.subjects.scores(subject_queries, career_ids),
+        )
+
+
+signal_index = CareerSignalIndex()
@@ -0,0 +1,220 @@
+import asyncio
+import importlib.util
+import os
+import numpy as np
+from ai_backeng import metrics
+from ai_backeng.db.postgres import connect_listener
+
+# Canal que notifica cambios en el catálogo (trigger en base_datos/cargar_datos.py)
+CAREERS_CHANNEL = "careers_changed"
+# Varias notificaciones seguidas (una carga masiva) => una sola recarga
+RELOAD_DEBOUNCE_SECONDS = 2.0
+# Espera entre intentos de reconectar el LISTEN (el último se repite)
+LISTENER_RETRY_SECONDS = (1, 2, 5, 10, 30)
+
+# HNSW opcional: con pocos miles de carreras el producto punto exacto ya es rápido
+VECTOR_INDEX_HNSW = os.getenv("VECTOR_INDEX_HNSW", "0") == "1"
+HNSW_AVAILABLE = importlib.util.find_spec("hnswlib") is not None
+
+# Embeddings + columnas normalizadas (base_datos/cargar_datos.py) para filtrar
+CAREER_EMBEDDINGS_QUERY = """
+    SELECT
+        c.id AS career_id,
+        c.embedding,
+        c.modality_norm AS modality,
+        u.type_norm AS university_type,
+        c.cities_norm AS cities
+    FROM careers c
+    JOIN universities u ON u.id = c.university_id
+    WHERE c.embedding IS NOT NULL
+"""
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _masks_by_value(values: list) -> dict[str, np.ndarray]:
+    """valor -> máscara booleana de las filas que lo tienen."""
+    masks = {}
+    for i, value in enumerate(values):
+        if value:
+            masks.setdefault(value, np.zeros(len(values), dtype=bool))[i] = True
+    return masks
+
+
+class _IndexData:
+    """Snapshot inmutable del índice: se reemplaza entero al recargar."""
+
+    def __init__(self, rows):
+        self.ids = [r["career_id"] for r in rows]
+        # El codec binario del pool ya entrega arrays float32
+        self.matrix = _normalize(np.stack([r["embedding"] for r in rows]))
+        self.modality_masks = _masks_by_value([r["modality"] for r in rows])
+        self.type_masks = _masks_by_value([r["university_type"] for r in rows])
+
+        # Una carrera puede estar en varias ciudades; las virtuales valen para todas
+        size = len(self.ids)
+        self.virtual = np.array(["virtual" in (r["cities"] or []) for r in rows], dtype=bool)
+        self.city_masks = {}
+        for i, r in enumerate(rows):
+            for city in r["cities"] or []:
+                self.city_masks.setdefault(city, np.zeros(size, dtype=bool))[i] = True
+
+        self.hnsw = None
+        if VECTOR_INDEX_HNSW and HNSW_AVAILABLE:
+            import hnswlib
+
+            self.hnsw = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+            self.hnsw.init_index(max_elements=size, ef_construction=200, M=16)
+            self.hnsw.add_items(self.matrix, np.arange(size))
+            self.hnsw.set_ef(100)
+
+    def mask(self, filters: dict) -> np.ndarray | None:
+        """Filas que cumplen los filtros (None = sin filtros)."""
+        mask = None
+        empty = np.zeros(len(self.ids), dtype=bool)
+
+        if filters.get("modality"):
+            mask = self.modality_masks.get(filters["modality"], empty)
+        if filters.get("university_type"):
+            type_mask = self.type_masks.get(filters["university_type"], empty)
+            mask = type_mask if mask is None else mask & type_mask
+        if filters.get("city"):
+            city_mask = self.city_masks.get(filters["city"], empty) | self.virtual
+            mask = city_mask if mask is None else mask & city_mask
+        return mask
+
+
+class CareerVectorIndex:
+    """
+    Índice en memoria de los embeddings de carreras (matriz float32 normalizada).
+    El score es similitud coseno, igual que pgvector (1 - distancia coseno).
+    Si no está cargado, el matching usa la consulta de Postgres.
+    """
+
+    def __init__(self):
+        self.data: _IndexData | None = None
+        # Otros cachés del catálogo (con load(pool)) que se recargan junto al índice
+        self.dependents: list = []
+        self._listener = None
+        self._listener_lost: asyncio.Event | None = None
+        self._listener_task: asyncio.Task | None = None
+        self._reload_task: asyncio.Task | None = None
+        # Notificación llegada durante una recarga: se recarga de nuevo al terminar
+        self._reload_pending = False
+
+    @property
+    def ready(self) -> bool:
+        return self.data is not None and len(self.data.ids) > 0
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(CAREER_EMBEDDINGS_QUERY)
+
+        if not rows:
+            print("⚠ Índice de carreras vacío, se usa pgvector")
+            return
+
+        # Swap atómico: las búsquedas en curso siguen con el índice anterior
+        self.data = _IndexData(rows)
+        print(f"✔ Índice de carreras cargado: {len(rows)} embeddings")
+
+    def count(self, filters: dict | None = None) -> int | None:
+        """Carreras que cumplen los filtros (None si el índice no está cargado)."""
+        if not self.ready:
+            return None
+        mask = self.data.mask(filters or {})
+        return len(self.data.ids) if mask is None else int(mask.sum())
+
+    def search(self, embedding, k: int, filters: dict | None = None) -> list[tuple]:
+        """Top-k (career_id, score) por similitud coseno entre las filas que cumplen los filtros."""
+        data = self.data
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        mask = data.mask(filters or {})
+        metrics.incr("vector_index.searches")
+
+        if mask is None and data.hnsw is not None:
+            k = min(k, len(data.ids))
+            labels, distances = data.hnsw.knn_query(query, k=k)
+            # En espacio "ip" hnswlib devuelve 1 - producto punto
+            return [(data.ids[i], float(1 - d)) for i, d in zip(labels[0], distances[0])]
+
+        # Exacto (con filtros siempre: el set filtrado es chico)
+        scores = data.matrix @ query
+        candidates = np.arange(len(data.ids)) if mask is None else np.flatnonzero(mask)
+        k = min(k, len(candidates))
+        if k == 0:
+            return []
+
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(data.ids[i], float(scores[i])) for i in top]
+
+    async def listen(self, pool):
+        """
+        Recarga el índice cuando el catálogo notifica cambios. Si la conexión
+        del LISTEN se cae, se reconecta en segundo plano y recarga (pudo
+        perderse alguna notificación mientras tanto).
+        """
+        await self._connect_listener(pool)
+        self._listener_task = asyncio.create_task(self._supervise_listener(pool))
+
+    async def _connect_listener(self, pool):
+        lost = asyncio.Event()
+        listener = await connect_listener()
+        listener.add_termination_listener(lambda _: lost.set())
+        await listener.add_listener(CAREERS_CHANNEL, lambda *_: self._schedule_reload(pool))
+        self._listener, self._listener_lost = listener, lost
+
+    async def _supervise_listener(self, pool):
+        while True:
+            await self._listener_lost.wait()
+            metrics.incr("vector_index.listener_lost")
+            print("⚠ Se perdió la conexión LISTEN del catálogo, reconectando")
+            self._listener.terminate()
+
+            attempt = 0
+            while True:
+                await asyncio.sleep(LISTENER_RETRY_SECONDS[min(attempt, len(LISTENER_RETRY_SECONDS) - 1)])
+                try:
+                    await self._connect_listener(pool)
+                    break
+                except Exception as e:
+                    attempt += 1
+                    print(f"⚠ No se pudo reconectar el LISTEN (intento {attempt}): {e}")
+
+            print("✔ LISTEN del catálogo reconectado")
+            self._schedule_reload(pool)
+
+    def _schedule_reload(self, pool):
+        self._reload_pending = True
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload(pool))
+
+    async def _reload(self, pool):
+        while self._reload_pending:
+            await asyncio.sleep(RELOAD_DEBOUNCE_SECONDS)
+            # Lo que llegue desde aquí (durante la carga) pide otra vuelta
+            self._reload_pending = False
+            for target in [self, *self.dependents]:
+                try:
+                    await target.load(pool)
+                except Exception as e:
+                    print(f"⚠ No se pudo recargar {type(target).__name__}: {e}")
+            metrics.incr("vector_index.reloads")
+
+    async def close(self):
+        # Primero el supervisor: cerrar el listener dispara su reconexión
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+
+career_index = CareerVectorIndex()
@@ -26,6 +26,9 @@ model = genai.GenerativeModel(
     }
 )
 
+# Campos que no aportan a la extracción y solo inflan el prompt
+PROMPT_EXCLUDED_FIELDS = ("user_embedding", "recomendaciones")
+
 # =========================
 # Utils
 # =========================
@@ -40,7 +43,14 @@ def set_nested(data: dict, path: str, value):
 # =========================
 # Extractor principal (Versión Gemini)
 # =========================
-def extract_profile_updates(user_message: str, current_profile: dict):
+async def extract_profile_updates(user_message: str, current_profile: dict):
+    profile_json = json.dumps(
+        {k: v for k, v in current_profile.items() if k not in PROMPT_EXCLUDED_FIELDS},
+        ensure_ascii=False,
+        # UUID/fechas que lleguen de Postgres o del caché local de sesiones
+        default=str
+    )
+
     # En Gemini no necesitas "limpieza defensiva" de triple backticks si usas JSON mode
     prompt = f"""
     Eres un experto en extracción de entidades. Tu objetivo es actualizar el perfil vocacional del usuario.
@@ -49,7 +59,7 @@ def extract_profile_updates(user_message: str, current_profile: dict):
     "{user_message}"
     
     PERFIL ACTUAL (Como referencia):
-    {json.dumps(current_profile)}
+    {profile_json}
 
     INSTRUCCIÓN:
     Extrae información nueva. Si el usuario contradice algo anterior, prevalece la información NUEVA.
@@ -58,8 +68,8 @@ def extract_profile_updates(user_message: str, current_profile: dict):
     """
 
     try:
-        # Generar contenido
-        response = model.generate_content(prompt)
+        # Generar contenido (cliente async: no bloquea el event loop)
+        response = await model.generate_content_async(prompt)
         
         # Con response_mime_type: "application/json", response.text ya es un JSON puro
         updates = json.loads(response.text)
@@ -71,7 +81,7 @@ def extract_profile_updates(user_message: str, current_profile: dict):
         # =========================
         # MERGE + NORMALIZACIÓN (Tu lógica original se mantiene igual)
         # =========================
-        updated_profile = json.loads(json.dumps(current_profile))
+        updated_profile = json.loads(profile_json)
 
         if "nombre" in updates: updated_profile["nombre"] = updates["nombre"]
         if "ciudad" in updates: set_nested(updated_profile, "preferencias.ciudad", updates["ciudad"])
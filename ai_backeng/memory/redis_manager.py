@@ -1,53 +1,323 @@
-import redis
 import json
 import os
 from datetime import datetime, timezone
+import redis.asyncio as redis
+from ai_backeng import metrics
+from ai_backeng.cache import LRUCache
+from ai_backeng.db.redis_client import get_redis
+from ai_backeng.memory.session_codec import (
+    VERSION_FIELD, decode_fields, decode_session, diff_session, dumps, encode_session
+)
+
+# Escritura atómica de una sesión (hash): campos sueltos, borrados, contadores
+# y fusión de listas sobre lo que haya en Redis en ese momento. Dos turnos
+# concurrentes del mismo usuario ya no se pisan: cada uno aplica solo su
+# diferencia. Devuelve {version nueva, 1 si alguien escribió desde la lectura}.
+#   KEYS[1] = session:{user_id}
+#   ARGV[1] = ttl, ARGV[2] = version leída, ARGV[3] = JSON {delete, incr, merge}
+#   ARGV[4..] = pares campo, valor (binarios: aquí va el embedding)
+SAVE_SCRIPT = """
+local key = KEYS[1]
+local ops = cjson.decode(ARGV[3])
+local conflict = 0
+if (redis.call('HGET', key, 'version') or '0') ~= ARGV[2] then
+    conflict = 1
+end
+
+for i = 4, #ARGV, 2 do
+    redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+end
+for _, field in ipairs(ops['delete']) do
+    redis.call('HDEL', key, field)
+end
+for field, n in pairs(ops['incr']) do
+    redis.call('HINCRBY', key, field, n)
+end
+for field, m in pairs(ops['merge']) do
+    local function ident(item)
+        if m['key'] ~= '' and type(item) == 'table' then
+            return tostring(item[m['key']])
+        end
+        return tostring(item)
+    end
+
+    local removed, seen, result = {}, {}, {}
+    for _, id in ipairs(m['remove']) do
+        removed[id] = true
+    end
+
+    local raw = redis.call('HGET', key, field)
+    if raw then
+        for _, item in ipairs(cjson.decode(raw)) do
+            local id = ident(item)
+            if not removed[id] and not seen[id] then
+                seen[id] = true
+                table.insert(result, item)
+            end
+        end
+    end
+    for _, item in ipairs(m['add']) do
+        local id = ident(item)
+        if not seen[id] then
+            seen[id] = true
+            table.insert(result, item)
+        end
+    end
+
+    -- cjson codifica la tabla vacía como objeto
+    if #result == 0 then
+        redis.call('HSET', key, field, '[]')
+    else
+        redis.call('HSET', key, field, cjson.encode(result))
+    end
+end
+
+local version = redis.call('HINCRBY', key, 'version', 1)
+redis.call('EXPIRE', key, ARGV[1])
+return {version, conflict}
+"""
+
+# Lectura condicionada a la versión: si la sesión sigue en la versión que
+# tiene el caché local devuelve 0 (sin transferir nada); si no, HGETALL.
+#   KEYS[1] = session:{user_id}, ARGV[1] = versión en caché
+READ_IF_CHANGED_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'version') == ARGV[1] then
+    return 0
+end
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# Caché local opcional de sesiones (por worker): turnos seguidos del mismo
+# usuario no vuelven a transferir ni parsear la sesión si su versión en
+# Redis no cambió (otro worker que escribe la sube y el caché se descarta)
+SESSION_LOCAL_CACHE = os.getenv("SESSION_LOCAL_CACHE", "0") == "1"
+SESSION_LOCAL_CACHE_SIZE = int(os.getenv("SESSION_LOCAL_CACHE_SIZE", 1024))
+SESSION_LOCAL_CACHE_TTL = float(os.getenv("SESSION_LOCAL_CACHE_TTL", 15 * 60))
+
+# Historial de recomendaciones fuera del perfil: sorted set (career_id, score =
+# turno en que se recomendó por primera vez, desempatado por posición) + hash
+# career_id → JSON. ZADD NX deduplica en O(1) y el set se recorta a las
+# RECOMMENDATIONS_CAP más recientes.
+RECOMMENDATIONS_CAP = int(os.getenv("RECOMMENDATIONS_CAP", 50))
+# Separación (s) entre posiciones de un mismo turno en el sorted set; muy
+# por debajo del tiempo entre dos turnos del mismo usuario
+RECOMMENDATION_RANK_STEP = 1e-3
+
+#   KEYS[1] = zset, KEYS[2] = hash de datos
+#   ARGV[1] = ttl, ARGV[2] = cap, ARGV[3..] = tríos career_id, score, JSON
+ADD_RECOMMENDATIONS_SCRIPT = """
+local added = 0
+for i = 3, #ARGV, 3 do
+    if redis.call('ZADD', KEYS[1], 'NX', ARGV[i + 1], ARGV[i]) == 1 then
+        redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 2])
+        added = added + 1
+    end
+end
+
+local overflow = redis.call('ZCARD', KEYS[1]) - tonumber(ARGV[2])
+if overflow > 0 then
+    local evicted = redis.call('ZRANGE', KEYS[1], 0, overflow - 1)
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, overflow - 1)
+    redis.call('HDEL', KEYS[2], unpack(evicted))
+end
+
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return added
+"""
+
+# Página de recomendaciones (más recientes primero) en un solo round-trip:
+# devuelve {total, JSON...}
+#   KEYS[1] = zset, KEYS[2] = hash de datos, ARGV[1] = inicio, ARGV[2] = fin
+READ_RECOMMENDATIONS_SCRIPT = """
+local total = redis.call('ZCARD', KEYS[1])
+local ids = redis.call('ZREVRANGE', KEYS[1], ARGV[1], ARGV[2])
+if #ids == 0 then
+    return {total}
+end
+local data = redis.call('HMGET', KEYS[2], unpack(ids))
+table.insert(data, 1, total)
+return data
+"""
+
+
+class SessionProfile(dict):
+    """
+    Perfil de la sesión + los campos tal como se leyeron de Redis y su
+    versión, para que save_profile escriba solo lo que cambió.
+    """
+
+    def __init__(self, data: dict, fields: dict | None = None, version: int = 0, legacy: bool = False):
+        super().__init__(data)
+        self.fields = fields or {}
+        self.version = version
+        # Sesión del formato anterior (string JSON): se reemplaza al guardar
+        self.legacy = legacy
+        # Recomendaciones que venían dentro del perfil (formato anterior):
+        # se pasan al sorted set en el próximo guardado
+        self.pending_recommendations = self.pop("recomendaciones", None) or []
+
+    def clone(self) -> "SessionProfile":
+        """Copia para el caché local: el turno modifica listas y dicts in place."""
+        data = {
+            k: list(v) if isinstance(v, list) else dict(v) if isinstance(v, dict) else v
+            for k, v in self.items()
+        }
+        clone = SessionProfile(data, self.fields, self.version, self.legacy)
+        clone.pending_recommendations = list(self.pending_recommendations)
+        return clone
 
 
 class SessionManager:
     def __init__(self):
-        self.redis = redis.Redis(
-            host=os.getenv("REDIS_HOST", "redis"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            db=int(os.getenv("REDIS_DB", 0)),
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_timeout=5,
-        )
-
         # 24 horas
         self.ttl = 60 * 60 * 24
+        self._scripts = {}
+        self.local = (
+            LRUCache(SESSION_LOCAL_CACHE_SIZE, SESSION_LOCAL_CACHE_TTL)
+            if SESSION_LOCAL_CACHE else None
+        )
 
-        # Test rápido de conexión (falla rápido si Redis no está)
-        try:
-            self.redis.ping()
-        except redis.exceptions.ConnectionError as e:
-            raise RuntimeError("No se pudo conectar a Redis") from e
+    @property
+    def redis(self):
+        # El cliente async se crea en el startup de FastAPI
+        return get_redis()
 
-    def get_profile(self, user_id: str):
+    def _script(self, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = self.redis.register_script(source)
+        return self._scripts[source]
+
+    async def get_profile(self, user_id: str):
         """Recupera la memoria del usuario. Si no existe, crea una nueva."""
-        data = self.redis.get(self._key(user_id))
-        if data:
-            return json.loads(data)
-        return self._empty_profile()
+        key = self._key(user_id)
+        cached = self.local.get(user_id) if self.local is not None else None
+        try:
+            if cached is None:
+                fields = await self.redis.hgetall(key)
+            else:
+                reply = await self._script(READ_IF_CHANGED_SCRIPT)(
+                    keys=[key], args=[cached.version], client=self.redis
+                )
+                if reply == 0:
+                    metrics.incr("session_cache.hit")
+                    return cached.clone()
+                metrics.incr("session_cache.stale")
+                fields = dict(zip(reply[::2], reply[1::2]))
+        except redis.ResponseError:
+            # Sesión guardada con el formato anterior (un solo string JSON)
+            data = await self.redis.get(key)
+            profile = json.loads(data) if data else self._empty_profile()
+            return SessionProfile(profile, legacy=True)
 
-    def save_profile(self, user_id: str, profile: dict):
+        if not fields:
+            if self.local is not None:
+                self.local.pop(user_id)
+            return SessionProfile(self._empty_profile())
+
+        fields = decode_fields(fields)
+        profile = self._empty_profile()
+        profile.update(decode_session(fields))
+        profile = SessionProfile(profile, fields, int(fields.get(VERSION_FIELD) or 0))
+        if self.local is not None:
+            self.local.set(user_id, profile.clone())
+        return profile
+
+    async def save_profile(self, user_id: str, profile: dict, recommendations: list[dict] | None = None):
         """
-        Sobreescribe la sesión con el perfil actualizado.
-        El merge debe hacerse antes.
+        Escribe en Redis solo los campos que cambiaron desde get_profile
+        (listas fusionadas y contadores sumados de forma atómica), agrega las
+        recomendaciones del turno y renueva el TTL: todo en un round-trip.
         """
-        self.redis.setex(
-            self._key(user_id),
-            self.ttl,
-            json.dumps(profile, ensure_ascii=False)
+        key = self._key(user_id)
+        previous = getattr(profile, "fields", {})
+        current = encode_session(profile)
+        sets, ops = diff_session(previous, current)
+        changed = bool(sets) or any(ops.values())
+        legacy = getattr(profile, "legacy", False)
+        recommendations = [*getattr(profile, "pending_recommendations", []), *(recommendations or [])]
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if legacy:
+                pipe.delete(key)
+            if changed:
+                args = [self.ttl, getattr(profile, "version", 0), dumps(ops)]
+                for field, value in sets.items():
+                    args += [field, value]
+                await self._script(SAVE_SCRIPT)(keys=[key], args=args, client=pipe)
+            else:
+                # Sin cambios: solo se renueva el TTL, sin reescribir la sesión
+                pipe.expire(key, self.ttl)
+            await self._queue_recommendations(pipe, user_id, recommendations)
+            results = await pipe.execute()
+
+        if isinstance(profile, SessionProfile):
+            profile.pending_recommendations = []
+        if not changed:
+            return
+        version, conflict = results[1 if legacy else 0]
+
+        metrics.incr("session.writes")
+        metrics.incr("session.fields_written", len(sets) + len(ops["merge"]) + len(ops["incr"]))
+        if conflict:
+            # Otro turno escribió en medio: su cambio se conservó (fusión por campo)
+            metrics.incr("session.concurrent_writes")
+
+        if isinstance(profile, SessionProfile):
+            profile.fields = current
+            profile.version = version
+            profile.legacy = False
+
+        if self.local is not None:
+            # Con escrituras ajenas en medio la copia local no refleja Redis
+            if conflict or not isinstance(profile, SessionProfile):
+                self.local.pop(user_id)
+            else:
+                self.local.set(user_id, profile.clone())
+
+    async def _queue_recommendations(self, pipe, user_id: str, recommendations: list[dict]):
+        keys = list(self._recommendation_keys(user_id))
+        recommendations = [r for r in recommendations if r.get("career_id") is not None]
+        if not recommendations:
+            # El historial vive lo mismo que la sesión
+            for k in keys:
+                pipe.expire(k, self.ttl)
+            return
+
+        args = [self.ttl, RECOMMENDATIONS_CAP]
+        for rec in recommendations:
+            args += [str(rec["career_id"]), _recommendation_score(rec), dumps(rec)]
+        await self._script(ADD_RECOMMENDATIONS_SCRIPT)(keys=keys, args=args, client=pipe)
+
+    async def get_recommendations(self, user_id: str, offset: int = 0, limit: int = 20) -> tuple[int, list[dict]]:
+        """(total, página de recomendaciones) de la más reciente a la más antigua."""
+        keys = list(self._recommendation_keys(user_id))
+        if limit <= 0:
+            # ZREVRANGE offset..offset-1 no es vacío (-1 = el último): solo el total
+            return await self.redis.zcard(keys[0]), []
+        reply = await self._script(READ_RECOMMENDATIONS_SCRIPT)(
+            keys=keys,
+            args=[offset, offset + limit - 1],
+            client=self.redis
         )
+        total, *data = reply
+        return total, [json.loads(d) for d in data if d]
+
+    async def touch(self, user_id: str):
+        """Renueva el TTL sin reescribir la sesión."""
+        await self.redis.expire(self._key(user_id), self.ttl)
 
-    def delete(self, user_id: str):
-        self.redis.delete(self._key(user_id))
+    async def delete(self, user_id: str):
+        if self.local is not None:
+            self.local.pop(user_id)
+        await self.redis.delete(self._key(user_id), *self._recommendation_keys(user_id))
 
     def _key(self, user_id: str) -> str:
         return f"session:{user_id}"
 
+    def _recommendation_keys(self, user_id: str) -> tuple[str, str]:
+        return f"session:{user_id}:recs", f"session:{user_id}:recs:data"
+
     def _now(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
@@ -70,8 +340,19 @@ class SessionManager:
                 "last_greeted_at": None,
                 "message_count": 0
             },
-            "recomendaciones": [],
             "materias_fuertes": [],
             "materias_debiles": [],
         }
 
+
+def _recommendation_score(rec: dict) -> float:
+    """
+    Score en el sorted set: instante del turno (epoch) menos un escalón por
+    posición, así ZREVRANGE da el turno más reciente primero y, dentro de
+    él, la mejor carrera primero.
+    """
+    try:
+        timestamp = datetime.fromisoformat(rec["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        timestamp = datetime.now(timezone.utc).timestamp()
+    return timestamp - (rec.get("rank") or 0) * RECOMMENDATION_RANK_STEP
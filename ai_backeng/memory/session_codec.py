@@ -0,0 +1,138 @@
+import json
+import os
+import numpy as np
+
+# Formato de la sesión en Redis (hash "session:{user_id}"), un campo por dato:
+#   nombre, intereses, ...      → JSON compacto de cada valor
+#   preferencias.X, meta.X      → los dicts se aplanan un nivel (se actualizan por separado)
+#   embedding                   → vector empaquetado (float32 por defecto, float16 opcional)
+#   embedding_dtype             → dtype con el que se empaquetó
+#   version                     → contador que sube en cada escritura
+# Así cada turno escribe solo los campos que cambió (ver SessionManager.save_profile).
+
+EMBEDDING_FIELD = "embedding"
+EMBEDDING_DTYPE_FIELD = "embedding_dtype"
+VERSION_FIELD = "version"
+# Formato anterior: todo el perfil (menos el embedding) en un solo campo
+LEGACY_PROFILE_FIELD = "profile"
+
+# Dicts que se guardan campo por campo ("preferencias.ciudad", ...)
+NESTED_FIELDS = ("preferencias", "meta")
+
+# Listas que se fusionan en Redis (unión/resta atómica): campo → clave de
+# identidad de cada elemento ("" = el elemento mismo).
+# Las recomendaciones no van en el hash: tienen su propio sorted set.
+MERGE_FIELDS = {
+    "intereses": "",
+    "habilidades_percibidas": "",
+    "materias_fuertes": "",
+    "materias_debiles": "",
+}
+
+# Contadores: se escribe la diferencia con HINCRBY (dos turnos a la vez suman ambos)
+COUNTER_FIELDS = ("meta.message_count",)
+
+SESSION_EMBEDDING_DTYPE = os.getenv("SESSION_EMBEDDING_DTYPE", "float32")
+if SESSION_EMBEDDING_DTYPE not in ("float32", "float16"):
+    raise RuntimeError(
+        f"SESSION_EMBEDDING_DTYPE '{SESSION_EMBEDDING_DTYPE}' no soportado (float32 | float16)"
+    )
+
+
+def dumps(obj) -> bytes:
+    """JSON compacto; default=str cubre UUID/fechas sin recorrer el dict antes."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def encode_embedding(embedding) -> bytes:
+    return np.asarray(embedding, dtype=SESSION_EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embedding(data: bytes, dtype: str = "float32") -> list[float]:
+    return np.frombuffer(data, dtype=dtype).astype(np.float32).tolist()
+
+
+def encode_session(profile: dict) -> dict[str, bytes]:
+    """Campos del hash para un perfil (sin version)."""
+    fields = {}
+    for key, value in profile.items():
+        if key == "user_embedding":
+            if value is not None:
+                fields[EMBEDDING_FIELD] = encode_embedding(value)
+                fields[EMBEDDING_DTYPE_FIELD] = SESSION_EMBEDDING_DTYPE.encode()
+        elif key in NESTED_FIELDS and isinstance(value, dict):
+            for sub, sub_value in value.items():
+                fields[f"{key}.{sub}"] = dumps(sub_value)
+        else:
+            fields[key] = dumps(value)
+    return fields
+
+
+def decode_fields(fields: dict) -> dict[str, bytes]:
+    """HGETALL devuelve claves bytes (decode_responses=False)."""
+    return {k.decode() if isinstance(k, bytes) else k: v for k, v in fields.items()}
+
+
+def decode_session(fields: dict[str, bytes]) -> dict:
+    """Perfil a partir de los campos del hash (ya con claves str)."""
+    profile = {}
+    if LEGACY_PROFILE_FIELD in fields:
+        profile.update(json.loads(fields[LEGACY_PROFILE_FIELD]))
+
+    for key, value in fields.items():
+        if key in (LEGACY_PROFILE_FIELD, EMBEDDING_FIELD, EMBEDDING_DTYPE_FIELD, VERSION_FIELD):
+            continue
+        parent, _, sub = key.partition(".")
+        if sub and parent in NESTED_FIELDS:
+            profile.setdefault(parent, {})[sub] = json.loads(value)
+        else:
+            profile[key] = json.loads(value)
+
+    embedding = fields.get(EMBEDDING_FIELD)
+    if embedding:
+        dtype = (fields.get(EMBEDDING_DTYPE_FIELD) or b"float32").decode()
+        profile["user_embedding"] = decode_embedding(embedding, dtype)
+    else:
+        profile["user_embedding"] = None
+    return profile
+
+
+def _identity(item, key: str) -> str:
+    if key and isinstance(item, dict):
+        return str(item.get(key))
+    return str(item)
+
+
+def diff_session(previous: dict[str, bytes], current: dict[str, bytes]) -> tuple[dict, dict]:
+    """
+    Operaciones para llevar la sesión de `previous` (campos leídos) a `current`:
+    (campos a escribir tal cual, {"delete", "incr", "merge"} para el script de Redis).
+    """
+    sets, incrs, merges = {}, {}, {}
+
+    for field, value in current.items():
+        old = previous.get(field)
+        if old == value:
+            continue
+
+        if field in MERGE_FIELDS:
+            key = MERGE_FIELDS[field]
+            old_items = json.loads(old) if old else []
+            new_items = json.loads(value)
+            old_ids = {_identity(i, key) for i in old_items}
+            new_ids = {_identity(i, key) for i in new_items}
+            add = [i for i in new_items if _identity(i, key) not in old_ids]
+            remove = sorted(old_ids - new_ids)
+            # Mismo conjunto (otro orden o codificación): nada que escribir
+            if add or remove:
+                merges[field] = {"key": key, "add": add, "remove": remove}
+        elif field in COUNTER_FIELDS and isinstance(json.loads(value), int):
+            incrs[field] = json.loads(value) - (json.loads(old) if old else 0)
+        else:
+            sets[field] = value
+
+    deletes = [
+        field for field in previous
+        if field not in current and field != VERSION_FIELD
+    ]
+    return sets, {"delete": deletes, "incr": incrs, "merge": merges}
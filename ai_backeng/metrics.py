@@ -0,0 +1,79 @@
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict, deque
+
+# Métricas en memoria del proceso (cada worker de uvicorn tiene las suyas).
+
+# Límites superiores (ms) de los buckets del histograma de cada latencia
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyStats:
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Ventana de las últimas muestras para percentiles
+        self.recent = deque(maxlen=window)
+        # Histograma desde el arranque (el último bucket es > 2500 ms)
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS_MS, seconds * 1000)] += 1
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+
+        def pct(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p / 100 * len(recent)))]
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(pct(50) * 1000, 2),
+            "p95_ms": round(pct(95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "histogram_ms": {
+                **{f"le_{b}": n for b, n in zip(HISTOGRAM_BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+_latencies: dict[str, LatencyStats] = defaultdict(LatencyStats)
+_counters: dict[str, int] = defaultdict(int)
+
+# Tiempos por request (los más recientes), consultables por request_id
+MAX_TRACKED_REQUESTS = 1000
+_requests: OrderedDict[str, dict] = OrderedDict()
+
+
+def observe(name: str, seconds: float):
+    _latencies[name].observe(seconds)
+
+
+def incr(name: str, n: int = 1):
+    _counters[name] += n
+
+
+def record_request(request_id: str, data: dict):
+    _requests[request_id] = data
+    _requests.move_to_end(request_id)
+    while len(_requests) > MAX_TRACKED_REQUESTS:
+        _requests.popitem(last=False)
+
+
+def get_request(request_id: str) -> dict | None:
+    return _requests.get(request_id)
+
+
+def snapshot() -> dict:
+    return {
+        "latencies": {name: s.summary() for name, s in sorted(_latencies.items())},
+        "counters": dict(sorted(_counters.items())),
+    }
@@ -0,0 +1,35 @@
+import hashlib
+import os
+from ai_backeng import metrics
+from ai_backeng.cache import LRUCache
+
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 1024))
+RERANK_CACHE_TTL = int(os.getenv("RERANK_CACHE_TTL", 60 * 30))
+
+
+def rerank_key(provider: str, user_query: str, careers: list[dict], top_k: int) -> tuple:
+    """Key = proveedor + hash de la query + tupla ordenada de career_id candidatos + top_k."""
+    query_hash = hashlib.sha256(user_query.encode("utf-8")).hexdigest()
+    candidate_ids = tuple(str(c.get("career_id")) for c in careers)
+    return (provider, query_hash, candidate_ids, top_k)
+
+
+class RerankCache:
+    """
+    Guarda el orden devuelto por el reranker (índices sobre los candidatos),
+    así un turno repetido de la misma conversación no vuelve a llamar a la red.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+
+    def get(self, key: tuple) -> list[int] | None:
+        indices = self.local.get(key)
+        metrics.incr("rerank_cache.hit" if indices is not None else "rerank_cache.miss")
+        return indices
+
+    def set(self, key: tuple, indices: list[int]):
+        self.local.set(key, indices)
+
+
+rerank_cache = RerankCache()
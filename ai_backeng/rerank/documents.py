@@ -0,0 +1,8 @@
+def build_rerank_document(career: dict) -> str:
+    """Texto de una carrera tal como lo ve el reranker (Voyage o local)."""
+    return (
+        f"Carrera: {career['career_name']}. "
+        f"Modalidad: {career['modality']}. "
+        f"Duración: {career['duration']} semestres. "
+        f"Descripción: {(career.get('description') or '')[:150]}"
+    )
@@ -0,0 +1,103 @@
+import asyncio
+import os
+from ai_backeng import metrics
+from ai_backeng.concurrency import BLOCKING_WORKERS, run_blocking
+from ai_backeng.rerank.voyage_rerank import RERANK_MIN_BUDGET
+
+# Cross-encoder multilingüe pequeño (entrenado en mMARCO, incluye español)
+LOCAL_RERANK_MODEL = os.getenv(
+    "LOCAL_RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+)
+# "torch" (default) u "onnx"; con onnx se puede elegir un archivo cuantizado int8
+LOCAL_RERANK_BACKEND = os.getenv("LOCAL_RERANK_BACKEND", "torch")
+LOCAL_RERANK_ONNX_FILE = os.getenv("LOCAL_RERANK_ONNX_FILE")
+LOCAL_RERANK_BATCH_SIZE = int(os.getenv("LOCAL_RERANK_BATCH_SIZE", 32))
+LOCAL_RERANK_TIMEOUT = float(os.getenv("LOCAL_RERANK_TIMEOUT", 2))
+# Predicciones simultáneas en el executor compartido (las vencidas siguen
+# corriendo hasta terminar y cuentan): más que esto => fallback inmediato
+LOCAL_RERANK_MAX_INFLIGHT = int(
+    os.getenv("LOCAL_RERANK_MAX_INFLIGHT", max(1, BLOCKING_WORKERS // 4))
+)
+
+_model = None
+_inflight = 0
+
+
+def _load():
+    from sentence_transformers import CrossEncoder
+
+    kwargs = {"device": "cpu"}
+    if LOCAL_RERANK_BACKEND == "onnx":
+        kwargs["backend"] = "onnx"
+        if LOCAL_RERANK_ONNX_FILE:
+            kwargs["model_kwargs"] = {"file_name": LOCAL_RERANK_ONNX_FILE}
+
+    return CrossEncoder(LOCAL_RERANK_MODEL, **kwargs)
+
+
+def _predict(user_query: str, documents: list[str], top_k: int) -> list[int]:
+    global _model
+    if _model is None:
+        _model = _load()
+
+    # Todos los pares (query, documento) en lotes: una pasada por el modelo
+    scores = _model.predict(
+        [(user_query, doc) for doc in documents],
+        batch_size=LOCAL_RERANK_BATCH_SIZE
+    )
+    order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)
+    return order[:top_k]
+
+
+def _prediction_done(task: asyncio.Task):
+    global _inflight
+    _inflight -= 1
+    # Las que vencieron nadie las espera: se lee el error para no dejarlo
+    # suelto (las esperadas ya lo reportó local_rerank)
+    if not task.cancelled():
+        task.exception()
+
+
+async def warmup_local_rerank():
+    await run_blocking(_predict, "warmup", ["warmup"], 1)
+
+
+async def local_rerank(
+    user_query: str,
+    documents: list[str],
+    top_k: int,
+    deadline=None
+) -> list[int] | None:
+    """
+    Mismo contrato que voyage_rerank, pero en CPU local. Un timeout no frena
+    el hilo: la predicción vencida sigue ocupando el executor hasta terminar,
+    por eso se cuentan y con el cupo lleno se hace fallback sin encolar.
+    """
+    global _inflight
+    timeout = LOCAL_RERANK_TIMEOUT if deadline is None else deadline.budget(LOCAL_RERANK_TIMEOUT)
+    if timeout < RERANK_MIN_BUDGET:
+        metrics.incr("rerank.fallback_no_budget")
+        return None
+
+    if _inflight >= LOCAL_RERANK_MAX_INFLIGHT:
+        metrics.incr("rerank.fallback_busy")
+        return None
+
+    _inflight += 1
+    task = asyncio.create_task(run_blocking(_predict, user_query, documents, top_k))
+    task.add_done_callback(_prediction_done)
+
+    try:
+        # shield: al vencer se deja de esperar, pero el task sigue hasta que
+        # el hilo termina (y recién ahí libera el cupo)
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+    except asyncio.TimeoutError:
+        metrics.incr("rerank.fallback_error")
+        print("⚠ Rerank local excedió el presupuesto, usando orden de recall")
+        return None
+    except Exception as e:
+        # Modelo no descargable, error de ONNX/tokenizer, memoria...: mismo
+        # contrato que voyage_rerank (None => el caller usa el orden del recall)
+        metrics.incr("rerank.fallback_error")
+        print(f"⚠ Rerank local falló ({type(e).__name__}: {e}), usando orden de recall")
+        return None
@@ -0,0 +1,56 @@
+import os
+from dotenv import load_dotenv
+from ai_backeng.rerank.cache import rerank_cache, rerank_key
+from ai_backeng.rerank.documents import build_rerank_document
+from ai_backeng.rerank.local_rerank import local_rerank, warmup_local_rerank
+from ai_backeng.rerank.voyage_rerank import voyage_rerank
+
+load_dotenv()
+
+# voyage (API) | local (cross-encoder en CPU)
+RERANK_PROVIDER = os.getenv("RERANK_PROVIDER", "voyage")
+
+BACKENDS = {
+    "voyage": voyage_rerank,
+    "local": local_rerank,
+}
+
+if RERANK_PROVIDER not in BACKENDS:
+    raise RuntimeError(
+        f"Rerank provider '{RERANK_PROVIDER}' not supported "
+        f"(opciones: {', '.join(BACKENDS)})"
+    )
+
+
+async def warmup_reranker():
+    """Se llama en el startup de FastAPI (carga el cross-encoder si aplica)."""
+    if RERANK_PROVIDER == "local":
+        await warmup_local_rerank()
+
+
+async def rerank_careers(
+    user_query: str,
+    careers: list[dict],
+    top_k: int = 5,
+    deadline=None
+):
+    if not careers:
+        return []
+
+    # Misma query + mismos candidatos (en el mismo orden) => mismo resultado
+    cache_key = rerank_key(RERANK_PROVIDER, user_query, careers, top_k)
+    cached = rerank_cache.get(cache_key)
+    if cached is not None:
+        return [careers[i] for i in cached]
+
+    # Las carreras del catálogo en memoria traen el documento ya armado
+    documents = [c.get("document") or build_rerank_document(c) for c in careers]
+    indices = await BACKENDS[RERANK_PROVIDER](user_query, documents, top_k, deadline)
+
+    # Fallback: los candidatos ya vienen ordenados (fusión RRF del recall,
+    # o por score si la política achicó el rerank)
+    if indices is None:
+        return careers[:top_k]
+
+    rerank_cache.set(cache_key, indices)
+    return [careers[i] for i in indices]
@@ -1,27 +1,36 @@
+import asyncio
 import os
-import requests
+import httpx
+from ai_backeng import metrics
+from ai_backeng.http_client import get_http_client
 
 VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY")
 VOYAGE_RERANK_URL = "https://api.voyageai.com/v1/rerank"
+VOYAGE_RERANK_MODEL = "rerank-2.5-lite"
 
-def rerank_careers(
+# Tope por llamada; dentro de un turno se recorta al presupuesto restante
+RERANK_TIMEOUT = float(os.getenv("RERANK_TIMEOUT", 5))
+# Con menos presupuesto que esto no vale la pena intentar la llamada
+RERANK_MIN_BUDGET = 0.2
+
+
+async def voyage_rerank(
     user_query: str,
-    careers: list[dict],
-    top_k: int = 5
-):
-    if not careers:
-        return []
-
-    documents = [
-        f"Carrera: {c['career_name']}. "
-        f"Modalidad: {c['modality']}. "
-        f"Duración: {c['duration']} semestres. "
-        f"Descripción: {c.get('description', '')[:150]}"
-        for c in careers
-    ]
+    documents: list[str],
+    top_k: int,
+    deadline=None
+) -> list[int] | None:
+    """
+    Índices de los top_k documentos según Voyage, o None si no hubo
+    respuesta válida a tiempo (el caller hace fallback al orden del recall).
+    """
+    timeout = RERANK_TIMEOUT if deadline is None else deadline.budget(RERANK_TIMEOUT)
+    if timeout < RERANK_MIN_BUDGET:
+        metrics.incr("rerank.fallback_no_budget")
+        return None
 
     payload = {
-        "model": "rerank-2.5-lite",
+        "model": VOYAGE_RERANK_MODEL,
         "query": user_query,
         "documents": documents,
         "top_k": top_k
@@ -32,14 +41,28 @@ def rerank_careers(
         "Content-Type": "application/json"
     }
 
-    res = requests.post(
-        VOYAGE_RERANK_URL,
-        json=payload,
-        headers=headers,
-        timeout=20
-    )
+    try:
+        # wait_for acota la llamada completa (conexión + respuesta)
+        res = await asyncio.wait_for(
+            get_http_client().post(VOYAGE_RERANK_URL, json=payload, headers=headers),
+            timeout
+        )
+        res.raise_for_status()
+    except (asyncio.TimeoutError, httpx.HTTPError) as e:
+        metrics.incr("rerank.fallback_error")
+        print(f"⚠ Rerank no disponible ({type(e).__name__}), usando orden de recall")
+        return None
 
-    res.raise_for_status()
-    data = res.json()["data"]
+    try:
+        indices = [int(item["index"]) for item in res.json()["data"]]
+    except (ValueError, KeyError, TypeError) as e:
+        # Cuerpo inesperado (JSON inválido o sin "data"): mismo fallback
+        metrics.incr("rerank.fallback_error")
+        print(f"⚠ Respuesta de rerank inválida ({type(e).__name__}), usando orden de recall")
+        return None
 
-    return [careers[item["index"]] for item in data]
+    if any(i < 0 or i >= len(documents) for i in indices):
+        metrics.incr("rerank.fallback_error")
+        print("⚠ Rerank devolvió índices fuera de rango, usando orden de recall")
+        return None
+    return indices
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, Query
 from typing import List
 from ai_backeng.schemas.career import CareerResponse
 from ai_backeng.db.postgres import get_pool
+from ai_backeng.db.queries import fetch
 
 router = APIRouter(
     prefix="/careers",
@@ -16,23 +17,8 @@ async def get_careers(
 ):
     offset = (page - 1) * limit
 
-    rows = await pool.fetch("""
-        SELECT
-            c.id,
-            c.career_name,
-            c.faculty_name,
-            c.description,
-            c.duration,
-            c.modality,
-            c.cost,
-            c.career_url,
-            u.url_logo,
-            u.name AS university_name
-        FROM careers c
-        LEFT JOIN universities u ON c.university_id = u.id
-        ORDER BY c.career_name
-        LIMIT $1 OFFSET $2
-    """, limit, offset)
+    async with pool.acquire() as conn:
+        rows = await fetch(conn, "careers_page", limit, offset)
 
     careers = {}
 
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import time
+from ai_backeng import metrics
+
+# Presupuesto total de un turno; las llamadas de red recortan su timeout a lo que quede
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", 30))
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, cap: float) -> float:
+        """Timeout para una llamada: el menor entre su tope y lo que queda del turno."""
+        return min(cap, self.remaining())
+
+
+class StageHook:
+    """
+    Punto de extensión por etapa del turno (timing, caché, saltos).
+    Las subclases sobreescriben solo lo que necesitan.
+    """
+
+    async def before_stage(self, stage: str, args: tuple):
+        """Si devuelve algo distinto de None, se usa como resultado y la etapa no se ejecuta."""
+        return None
+
+    async def after_stage(self, stage: str, result, elapsed: float):
+        pass
+
+
+class TurnScheduler:
+    """
+    Ejecuta las etapas de un turno de chat (en serie o en paralelo)
+    registrando cuánto tarda cada una.
+    """
+
+    def __init__(self, hooks: list[StageHook] | None = None):
+        self.started_at = time.perf_counter()
+        self.timings: dict[str, float] = {}
+        self.hooks = hooks or []
+        self.deadline = Deadline(TURN_BUDGET_SECONDS)
+        self._tasks: list[asyncio.Task] = []
+
+    async def run(self, stage: str, func, *args):
+        """Ejecuta func(*args) como etapa y guarda su duración."""
+        for hook in self.hooks:
+            cached = await hook.before_stage(stage, args)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        result = await func(*args)
+        elapsed = time.perf_counter() - start
+        self.record(stage, elapsed)
+
+        for hook in self.hooks:
+            await hook.after_stage(stage, result, elapsed)
+        return result
+
+    def start(self, stage: str, func, *args) -> asyncio.Task:
+        """Lanza una etapa en segundo plano y devuelve su task."""
+        task = asyncio.create_task(self.run(stage, func, *args))
+        self._tasks.append(task)
+        return task
+
+    def record(self, stage: str, elapsed: float):
+        """Registra la duración de una etapa medida fuera de run() (p. ej. un stream)."""
+        self.timings[stage] = elapsed
+        metrics.observe(f"stage.{stage}", elapsed)
+
+    async def cancel_pending(self):
+        """Cancela las etapas lanzadas que ya no se necesitan."""
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        # return_exceptions también consume errores de tasks ya terminadas
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def finish(self) -> dict:
+        total = time.perf_counter() - self.started_at
+        metrics.observe("turn.total", total)
+        return {
+            "total_ms": round(total * 1000, 1),
+            **{k: round(v * 1000, 1) for k, v in self.timings.items()},
+        }
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from ai_backeng import metrics
+from ai_backeng.conversation import ConversationTurn, normalize_for_json
+from ai_backeng.scheduler import StageHook
+
+FALLBACK_MESSAGE = "Lo siento, no pude generar una respuesta en este momento.\n"
+END_MARKER = "\n[END]\n"
+
+STREAM_HEADERS = {
+    # Evita que proxies (nginx) acumulen el stream
+    "X-Accel-Buffering": "no",
+    "Cache-Control": "no-cache",
+}
+
+
+class StreamTimings:
+    """Tiempos de un request de streaming, medidos desde que llega."""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.received_at = time.perf_counter()
+        self.data: dict = {}
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.received_at) * 1000, 1)
+
+    def mark(self, name: str):
+        self.data[f"{name}_ms"] = self.elapsed_ms()
+
+    def first_token(self):
+        if "ttfb_ms" not in self.data:
+            self.mark("ttfb")
+            metrics.observe("stream.ttfb", self.data["ttfb_ms"] / 1000)
+
+    def close(self, turn: ConversationTurn) -> dict:
+        self.data["stages"] = turn.finish()
+        self.mark("total")
+        metrics.record_request(self.request_id, self.data)
+        return self.data
+
+
+async def text_chat_stream(turn: ConversationTurn, timings: StreamTimings):
+    """Protocolo original: texto plano terminado en [END]."""
+    has_content = False
+
+    # 0️⃣ Las cabeceras (con X-Request-Id) salen antes de este punto:
+    #    el cliente sabe que el turno está en curso mientras corren las etapas
+    timings.mark("ack")
+
+    try:
+        await turn.prepare()
+
+        # 1️⃣ Iteramos los chunks del modelo (stream async)
+        async for text in turn.stream():
+            if text.strip():   # ignoramos strings vacíos
+                timings.first_token()
+                has_content = True
+                yield text
+    except Exception as e:
+        # La respuesta ya empezó: no podemos cambiar el status code
+        print(f"❌ Error en /chat/stream ({timings.request_id}): {e}")
+
+    # 2️⃣ Fallback si no hubo contenido
+    if not has_content:
+        timings.first_token()
+        yield FALLBACK_MESSAGE
+
+    # 3️⃣ Guardamos la memoria del usuario **al final del streaming**
+    if turn.user_memory:
+        await turn.save()
+    print(f"⏱ Turno /chat/stream ({timings.request_id}):", timings.close(turn))
+
+    # 4️⃣ Marcamos fin de la transmisión
+    yield END_MARKER
+
+
+# ------------------------------------------------------------------
+# SERVER-SENT EVENTS
+# ------------------------------------------------------------------
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def career_payload(career: dict) -> dict:
+    return normalize_for_json({
+        "career_id": career.get("career_id"),
+        "career_name": career.get("career_name"),
+        "university_id": career.get("university_id"),
+        "university_name": career.get("university_name"),
+        "modality": career.get("modality"),
+        "duration": career.get("duration"),
+        "score": career.get("score"),
+    })
+
+
+class StageEventHook(StageHook):
+    """Publica en una cola un evento por cada etapa terminada."""
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    async def after_stage(self, stage, result, elapsed):
+        self.queue.put_nowait(sse_event("stage", {
+            "stage": stage,
+            "elapsed_ms": round(elapsed * 1000, 1),
+        }))
+
+
+def sse_turn(user_id: str, message: str, session_manager) -> tuple[ConversationTurn, asyncio.Queue]:
+    queue = asyncio.Queue()
+    turn = ConversationTurn(user_id, message, session_manager, hooks=[StageEventHook(queue)])
+    return turn, queue
+
+
+async def sse_chat_stream(turn: ConversationTurn, queue: asyncio.Queue, timings: StreamTimings):
+    """
+    Eventos tipados: stage (por etapa), careers (en cuanto termina el matching),
+    token (texto del modelo), error y done (con los tiempos del request).
+    """
+    has_content = False
+
+    yield sse_event("stage", {"stage": "accepted", "request_id": timings.request_id})
+    timings.mark("ack")
+
+    # Las etapas corren en una task; sus eventos se emiten a medida que terminan
+    prepare = asyncio.create_task(turn.prepare())
+    prepare.add_done_callback(lambda _: queue.put_nowait(None))
+
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        await prepare
+
+        yield sse_event("careers", [career_payload(c) for c in turn.careers])
+        timings.mark("careers")
+
+        async for text in turn.stream():
+            if text.strip():
+                timings.first_token()
+                has_content = True
+                yield sse_event("token", {"text": text})
+    except Exception as e:
+        print(f"❌ Error en /chat/stream SSE ({timings.request_id}): {e}")
+        yield sse_event("error", {"message": FALLBACK_MESSAGE.strip()})
+    finally:
+        if not prepare.done():
+            prepare.cancel()
+
+    if turn.user_memory:
+        await turn.save()
+
+    yield sse_event("done", {"has_content": has_content, **timings.close(turn)})
@@ -24,6 +24,42 @@ def build_career_id(career: dict) -> str:
    return f"{university}_{modality}_{career_name}"
 
 
+# ======================
+# COLUMNAS NORMALIZADAS (para filtrar en el matching sin unaccent por fila)
+# ======================
+
+def normalize_key(text) -> str | None:
+   """Minúsculas, sin tildes ni espacios extra."""
+   if not text:
+       return None
+   text = " ".join(str(text).lower().split())
+   text = unicodedata.normalize("NFD", text)
+   return "".join(c for c in text if unicodedata.category(c) != "Mn") or None
+
+# Valores posibles de modality_norm (los mismos que acepta el backend)
+MODALITY_ALIASES = {
+   "presencial": "presencial",
+   "presencial diurna": "presencial",
+   "presencial nocturna": "presencial",
+   "hibrida": "hibrida",
+   "semipresencial": "hibrida",
+   "dual": "dual",
+   "en linea": "en linea",
+   "virtual": "en linea",
+   "online": "en linea",
+}
+
+def normalize_modality(modality) -> str | None:
+   return MODALITY_ALIASES.get(normalize_key(modality))
+
+def normalize_university_type(utype) -> str | None:
+   utype = normalize_key(utype)
+   return utype if utype in ("publica", "privada") else None
+
+def normalize_cities(locations) -> list[str]:
+   return sorted({c for c in (normalize_key(loc) for loc in locations or []) if c})
+
+
 # Conexión a PostgreSQL
 conn = psycopg2.connect(
    host=os.getenv("DB_HOST"),
@@ -78,6 +114,38 @@ def create_tables():
        location TEXT
    );
    """)
+   # Columnas normalizadas (tablas ya existentes las reciben con ALTER)
+   cur.execute("ALTER TABLE careers ADD COLUMN IF NOT EXISTS modality_norm TEXT;")
+   cur.execute("ALTER TABLE careers ADD COLUMN IF NOT EXISTS cities_norm TEXT[] NOT NULL DEFAULT '{}';")
+   cur.execute("ALTER TABLE universities ADD COLUMN IF NOT EXISTS type_norm TEXT;")
+
+   # Texto de búsqueda (nombre + descripción + materias) para el recall léxico
+   cur.execute("CREATE EXTENSION IF NOT EXISTS unaccent;")
+   cur.execute("ALTER TABLE careers ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR;")
+
+   # Índices de apoyo para los filtros del recall (modalidad / ciudad / universidad)
+   cur.execute("CREATE INDEX IF NOT EXISTS careers_modality_norm_idx ON careers (modality_norm);")
+   cur.execute("CREATE INDEX IF NOT EXISTS careers_cities_norm_idx ON careers USING GIN (cities_norm);")
+   cur.execute("CREATE INDEX IF NOT EXISTS universities_type_norm_idx ON universities (type_norm);")
+   cur.execute("CREATE INDEX IF NOT EXISTS career_locations_career_id_idx ON career_locations (career_id);")
+   cur.execute("CREATE INDEX IF NOT EXISTS careers_university_id_idx ON careers (university_id);")
+   cur.execute("CREATE INDEX IF NOT EXISTS careers_search_tsv_idx ON careers USING GIN (search_tsv);")
+
+   # Avisa al backend (LISTEN careers_changed) para recargar su índice en memoria
+   cur.execute("""
+   CREATE OR REPLACE FUNCTION notify_careers_changed() RETURNS trigger AS $$
+   BEGIN
+       PERFORM pg_notify('careers_changed', TG_OP);
+       RETURN NULL;
+   END;
+   $$ LANGUAGE plpgsql;
+   """)
+   cur.execute("""
+   DROP TRIGGER IF EXISTS careers_changed ON careers;
+   CREATE TRIGGER careers_changed
+   AFTER INSERT OR UPDATE OR DELETE ON careers
+   FOR EACH STATEMENT EXECUTE FUNCTION notify_careers_changed();
+   """)
    conn.commit()
 
 # Funciones para insertar datos
@@ -88,8 +156,8 @@ def get_or_create_university(name, utype, contact):
        return res[0]
 
    cur.execute(
-       "INSERT INTO universities (name, type, contact) VALUES (%s,%s,%s) RETURNING id",
-       (name, utype, contact)
+       "INSERT INTO universities (name, type, contact, type_norm) VALUES (%s,%s,%s,%s) RETURNING id",
+       (name, utype, contact, normalize_university_type(utype))
    )
    university_id = cur.fetchone()[0]
    conn.commit()
@@ -104,11 +172,14 @@ def insert_career(career, university_id):
    cur.execute("""
    INSERT INTO careers (
        career_id, university_id, career_name, faculty_name, degree_title, description,
-       modality, duration, cost, career_url, study_plan_name, study_plan_pdf, data_collection_date
-   ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+       modality, duration, cost, career_url, study_plan_name, study_plan_pdf, data_collection_date,
+       modality_norm, cities_norm
+   ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
    ON CONFLICT (career_id) DO UPDATE SET
        university_id = EXCLUDED.university_id,
-       career_name = EXCLUDED.career_name
+       career_name = EXCLUDED.career_name,
+       modality_norm = EXCLUDED.modality_norm,
+       cities_norm = EXCLUDED.cities_norm
    RETURNING id
    """, (
        career_code,
@@ -123,7 +194,9 @@ def insert_career(career, university_id):
        career.get("career_url"),
        career.get("study_plan_name"),
        career.get("study_plan_pdf"),
-       career.get("data_collection_date")
+       career.get("data_collection_date"),
+       normalize_modality(career.get("modality")),
+       normalize_cities(career.get("locations"))
    ))
 
    career_id = cur.fetchone()[0]
@@ -147,6 +220,45 @@ def insert_locations(career_id, locations):
        """, (career_id, loc))
    conn.commit()
 
+def backfill_normalized_columns():
+   """Completa las columnas normalizadas de filas cargadas antes de existir."""
+   cur.execute("SELECT id, type FROM universities WHERE type_norm IS NULL")
+   for uid, utype in cur.fetchall():
+       cur.execute(
+           "UPDATE universities SET type_norm=%s WHERE id=%s",
+           (normalize_university_type(utype), uid)
+       )
+
+   cur.execute("""
+   SELECT c.id, c.modality, array_remove(array_agg(l.location), NULL)
+   FROM careers c
+   LEFT JOIN career_locations l ON l.career_id = c.id
+   WHERE c.modality_norm IS NULL OR c.cities_norm = '{}'
+   GROUP BY c.id
+   """)
+   for cid, modality, locations in cur.fetchall():
+       cur.execute(
+           "UPDATE careers SET modality_norm=%s, cities_norm=%s WHERE id=%s",
+           (normalize_modality(modality), normalize_cities(locations), cid)
+       )
+   conn.commit()
+
+def refresh_search_vectors(career_id=None):
+   """
+   Recalcula search_tsv (sin tildes, diccionario spanish): nombre con peso A,
+   descripción B y nombres de materias C. Sin career_id recalcula todas.
+   """
+   cur.execute("""
+   UPDATE careers c SET search_tsv =
+       setweight(to_tsvector('spanish', unaccent(coalesce(c.career_name, ''))), 'A') ||
+       setweight(to_tsvector('spanish', unaccent(coalesce(c.description, ''))), 'B') ||
+       setweight(to_tsvector('spanish', unaccent(coalesce((
+           SELECT string_agg(s.name, ' ') FROM subjects s WHERE s.career_id = c.id
+       ), ''))), 'C')
+   WHERE %s::int IS NULL OR c.id = %s::int
+   """, (career_id, career_id))
+   conn.commit()
+
 # Cargar JSON
 def load_json(path):
    with open(path, encoding="utf-8") as f:
@@ -166,9 +278,12 @@ def process_file(path):
        career_id = insert_career(c, university_id)
        insert_locations(career_id, c.get("locations", []))
        insert_subjects(career_id, c.get("subjects", []))
+       refresh_search_vectors(career_id)
        print(f"✔ {c['career_name']}")
 
 if __name__ == "__main__":
    process_file("/app/Data_UniDream/data_unificada/UIDE.json")  # Cambia a la ruta de tu JSON
+   backfill_normalized_columns()
+   refresh_search_vectors()
    cur.close()
    conn.close()
@@ -1,9 +1,16 @@
-from sentence_transformers import SentenceTransformer
 import os
+from dotenv import load_dotenv
 
-PROVIDER = os.getenv("EMBEDDING_PROVIDER", "local-e5")
+load_dotenv()
+
+# Mismo EMBEDDING_PROVIDER (y mismo nombre de modelo) que el backend
+# (ai_backeng/embeddings/providers.py): el backend solo usa las filas cuyo
+# embedding_model coincide con el de su proveedor
+PROVIDER = os.getenv("EMBEDDING_PROVIDER", "voyage")
 
 if PROVIDER == "local-e5":
+    from sentence_transformers import SentenceTransformer
+
     model = SentenceTransformer("intfloat/multilingual-e5-large")
 
     def get_embedding(text: str) -> list[float]:
@@ -15,4 +22,38 @@ if PROVIDER == "local-e5":
         )
         return embedding.tolist()
 
+    def get_embeddings(texts: list[str], batch_size: int = 64) -> list[list[float]]:
+        # Un solo encode por lote: mucho más rápido que texto por texto
+        embeddings = model.encode(
+            [f"passage: {t}" for t in texts],
+            batch_size=batch_size,
+            normalize_embeddings=True
+        )
+        return embeddings.tolist()
+
     EMBEDDING_MODEL_NAME = "intfloat/multilingual-e5-large"
+
+elif PROVIDER == "voyage":
+    import voyageai
+
+    api_key = os.getenv("VOYAGE_API_KEY")
+    if not api_key:
+        raise RuntimeError("VOYAGE_API_KEY not set in .env")
+
+    client = voyageai.Client(api_key=api_key)
+    EMBEDDING_MODEL_NAME = "voyage-4-lite"
+
+    def get_embedding(text: str) -> list[float]:
+        return client.embed(texts=[text], model=EMBEDDING_MODEL_NAME).embeddings[0]
+
+    def get_embeddings(texts: list[str], batch_size: int = 128) -> list[list[float]]:
+        embeddings = []
+        for i in range(0, len(texts), batch_size):
+            response = client.embed(texts=texts[i:i + batch_size], model=EMBEDDING_MODEL_NAME)
+            embeddings.extend(response.embeddings)
+        return embeddings
+
+else:
+    raise RuntimeError(
+        f"Embedding provider '{PROVIDER}' not supported en base_datos (opciones: local-e5, voyage)"
+    )
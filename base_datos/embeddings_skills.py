@@ -1,10 +1,16 @@
 import os
 from supabase import create_client
-from embedding_provider import get_embedding, EMBEDDING_MODEL_NAME
+from embedding_provider import get_embeddings, EMBEDDING_MODEL_NAME
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Sin embedding o embebidas con otro modelo (cambio de EMBEDDING_PROVIDER):
+# el backend solo carga las del modelo activo
+NEEDS_EMBEDDING = (
+    f'embedding.is.null,embedding_model.is.null,embedding_model.neq."{EMBEDDING_MODEL_NAME}"'
+)
+
 supabase = create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_KEY")
@@ -13,14 +19,14 @@ supabase = create_client(
 def embed_skills():
     skills = supabase.table("skills") \
         .select("id, name") \
-        .is_("embedding", None) \
+        .or_(NEEDS_EMBEDDING) \
         .execute().data
 
-    print(f"📌 Skills sin embedding: {len(skills)}")
+    print(f"📌 Skills sin embedding de {EMBEDDING_MODEL_NAME}: {len(skills)}")
 
-    for s in skills:
-        embedding = get_embedding(s["name"])
+    embeddings = get_embeddings([s["name"] for s in skills])
 
+    for s, embedding in zip(skills, embeddings):
         supabase.table("skills").update({
             "embedding": embedding,
             "embedding_model": EMBEDDING_MODEL_NAME
@@ -30,24 +36,24 @@ def embed_skills():
 
 def embed_subjects():
     batch_size = 1000
-    offset = 0
     total_processed = 0
 
     while True:
         subjects = supabase.table("subjects") \
             .select("id, name") \
-            .is_("embedding", None) \
-            .range(offset, offset + batch_size - 1) \
+            .or_(NEEDS_EMBEDDING) \
+            .range(0, batch_size - 1) \
             .execute().data
 
         if not subjects:
             break
 
-        print(f"📌 Procesando {len(subjects)} subjects (offset {offset})")
+        # Las ya actualizadas salen del filtro: siempre se lee el primer lote
+        print(f"📌 Procesando {len(subjects)} subjects (llevamos {total_processed})")
 
-        for sub in subjects:
-            embedding = get_embedding(sub["name"])
+        embeddings = get_embeddings([sub["name"] for sub in subjects])
 
+        for sub, embedding in zip(subjects, embeddings):
             supabase.table("subjects").update({
                 "embedding": embedding,
                 "embedding_model": EMBEDDING_MODEL_NAME
@@ -56,10 +62,9 @@ def embed_subjects():
             total_processed += 1
             print(f"✔ Embedded subject: {sub['name']}")
 
-        offset += batch_size
-
     print(f"🎉 Total subjects embebidos: {total_processed}")
 
 
 if __name__ == "__main__":
+    embed_skills()
     embed_subjects()
@@ -0,0 +1,84 @@
+"""
+Evaluación offline de la política adaptativa de rerank (ai_backeng/matching/policy.py)
+sobre turnos grabados con MATCHING_RECORD_PATH.
+
+    MATCHING_RECORD_PATH=matching.jsonl uvicorn ai_backeng.main:app ...
+    python -m benchmarks.adaptive_policy matching.jsonl --top-k 5
+
+Solo los turnos con rerank completo ("full") tienen la respuesta del
+reranker sobre todos los candidatos; contra esa respuesta se mide, para
+cada umbral, cuántos reranks se saltarían o achicarían y cuánto cambia
+el resultado: overlap@k del top-k por score (skip) y fracción del top-k
+rerankeado que sigue dentro del set achicado (shrink).
+"""
+import argparse
+import json
+import statistics
+from collections import Counter
+
+from ai_backeng.matching.policy import RERANK_SHRINK_EXTRA, rerank_plan
+
+MARGINS = [0.01, 0.02, 0.03, 0.05, 0.08, 0.1, 0.15]
+
+
+def load_records(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(records: list[dict], top_k: int, margin: float, mode: str) -> dict:
+    """Aplica solo una de las dos reglas (skip o shrink) con el umbral dado."""
+    triggered, agreement, sizes = 0, [], []
+
+    for r in records:
+        reranked = set(r["result"][:top_k])
+        if mode == "skip":
+            decision, kept = rerank_plan(r["candidates"], top_k, skip_margin=margin, shrink_margin=float("inf"))
+        else:
+            decision, kept = rerank_plan(r["candidates"], top_k, skip_margin=float("inf"), shrink_margin=margin)
+
+        sizes.append(len(kept))
+        if decision == "full":
+            continue
+
+        triggered += 1
+        kept_ids = {c["career_id"] for c in kept}
+        agreement.append(len(reranked & kept_ids) / max(len(reranked), 1))
+
+    return {
+        "rate": triggered / len(records),
+        "agreement": statistics.mean(agreement) if agreement else None,
+        "avg_candidates": statistics.mean(sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load_records(args.path)
+    decisions = Counter(r["decision"] for r in records)
+    full = [r for r in records if r["decision"] == "full" and len(r["candidates"]) > args.top_k]
+
+    print(f"turnos={len(records)} decisiones={dict(decisions)}")
+    print(f"recall_k p50={statistics.median(r['recall_k'] for r in records) if records else 0}")
+    if not full:
+        print("⚠ No hay turnos con rerank completo para comparar")
+        return
+
+    print(f"\nturnos evaluables (rerank completo)={len(full)} top_k={args.top_k}")
+    for mode, label in (("skip", "overlap@k"), ("shrink", f"top-k dentro (k+{RERANK_SHRINK_EXTRA})")):
+        print(f"\n{mode}:")
+        for margin in MARGINS:
+            res = evaluate(full, args.top_k, margin, mode)
+            agreement = "-" if res["agreement"] is None else f"{res['agreement']:.2f}"
+            print(
+                f"  margen>={margin:<5} aplica={res['rate']:6.1%} "
+                f"{label}={agreement:>5} candidatos_prom={res['avg_candidates']:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Latencia y throughput por proveedor de embeddings.
+
+    python -m benchmarks.embedding_providers --providers voyage local-e5-small local-minilm
+
+Mide: latencia de un texto (perfil de usuario, como en cada turno) y
+throughput en lotes (descripciones de carreras, como en los loaders).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from ai_backeng.embeddings.providers import create_provider
+from benchmarks.fixtures import PROFILES, load_careers, profile_query
+
+
+async def bench(name: str, repeats: int, batch_size: int):
+    provider = create_provider(name)
+
+    start = time.perf_counter()
+    await provider.warmup()
+    warmup = time.perf_counter() - start
+
+    queries = [profile_query(p) for p in PROFILES]
+    single = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        await provider.embed([queries[i % len(queries)]])
+        single.append(time.perf_counter() - start)
+
+    docs = [c["career_name"] + ". " + c["description"][:300] for c in load_careers()][:batch_size * 4]
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        await provider.embed(docs[i:i + batch_size])
+    batch_elapsed = time.perf_counter() - start
+
+    single.sort()
+    print(
+        f"{name:<16} warmup={warmup:6.2f}s "
+        f"1 texto p50={statistics.median(single) * 1000:7.1f}ms "
+        f"p95={single[int(0.95 * (len(single) - 1))] * 1000:7.1f}ms "
+        f"lotes={len(docs) / batch_elapsed:7.1f} textos/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--providers", nargs="+", default=["voyage", "local-e5-small", "local-minilm"])
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    for name in args.providers:
+        try:
+            await bench(name, args.repeats, args.batch_size)
+        except Exception as e:
+            print(f"{name:<16} error: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
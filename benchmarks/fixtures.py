@@ -0,0 +1,53 @@
+"""
+Datos fijos para los benchmarks: carreras reales de Data_UniDream y un
+conjunto de perfiles de usuario de ejemplo.
+"""
+import json
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "Data_UniDream" / "data_unificada"
+
+PROFILES = [
+    {"intereses": ["programación", "videojuegos"], "habilidades_percibidas": ["lógica"], "materias_fuertes": ["matemáticas"]},
+    {"intereses": ["salud", "biología"], "habilidades_percibidas": ["empatía"], "materias_fuertes": ["química", "biología"]},
+    {"intereses": ["dibujo", "música"], "habilidades_percibidas": ["creatividad"], "materias_fuertes": ["arte"]},
+    {"intereses": ["negocios", "finanzas"], "habilidades_percibidas": ["liderazgo", "comunicación"], "materias_fuertes": ["contabilidad"]},
+    {"intereses": ["construcción", "puentes"], "habilidades_percibidas": ["cálculo"], "materias_fuertes": ["física", "matemáticas"]},
+    {"intereses": ["medio ambiente", "agricultura"], "habilidades_percibidas": ["trabajo de campo"], "materias_fuertes": ["biología"]},
+    {"intereses": ["derecho", "política"], "habilidades_percibidas": ["argumentación"], "materias_fuertes": ["historia", "lenguaje"]},
+    {"intereses": ["ciberseguridad", "redes"], "habilidades_percibidas": ["análisis"], "materias_fuertes": ["informática"]},
+    {"intereses": ["educación", "niños"], "habilidades_percibidas": ["paciencia"], "materias_fuertes": ["lenguaje"]},
+    {"intereses": ["robótica", "electrónica"], "habilidades_percibidas": ["resolución de problemas"], "materias_fuertes": ["física"]},
+]
+
+
+def profile_query(profile: dict) -> str:
+    """Mismo formato que agent.build_user_embedding_text (sin importar Gemini)."""
+    partes = []
+    if profile.get("intereses"):
+        partes.append("Intereses: " + ", ".join(sorted(profile["intereses"])))
+    if profile.get("habilidades_percibidas"):
+        partes.append("Habilidades: " + ", ".join(sorted(profile["habilidades_percibidas"])))
+    if profile.get("materias_fuertes"):
+        partes.append("Materias fuertes: " + ", ".join(sorted(profile["materias_fuertes"])))
+    return ". ".join(partes)
+
+
+def load_careers() -> list[dict]:
+    """Carreras de todos los JSON unificados, con el formato de las filas de Postgres."""
+    careers = []
+    for path in sorted(DATA_DIR.glob("*.json")):
+        with open(path, encoding="utf-8") as f:
+            for i, c in enumerate(json.load(f)):
+                careers.append({
+                    "career_id": c.get("career_id") or f"{path.stem}_{i}",
+                    "career_name": c["career_name"],
+                    "description": c.get("description") or "",
+                    "modality": c.get("modality"),
+                    "duration": c.get("duration") or c.get("semesters"),
+                    "university_name": c.get("university_name"),
+                    "university_type": c.get("university_type"),
+                    "locations": c.get("locations", []),
+                    "subjects": [s["name"] for s in c.get("subjects", []) if s.get("name")],
+                })
+    return careers
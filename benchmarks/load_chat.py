@@ -0,0 +1,93 @@
+"""
+Benchmark de carga para /chat y /chat/stream.
+
+Lanza N conversaciones concurrentes contra una instancia levantada con
+UN solo worker de uvicorn y reporta throughput y latencias:
+
+    uvicorn ai_backeng.main:app --workers 1
+    python -m benchmarks.load_chat --url http://localhost:8000 --users 50 --turns 3
+
+Para comparar antes/después se corre el mismo comando contra cada versión
+(mismo Redis, Postgres y claves de API) y se comparan las líneas de resumen.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+MESSAGES = [
+    "Hola, me llamo Ana y vivo en Quito",
+    "Me gustan la programación y las matemáticas",
+    "Prefiero modalidad presencial en una universidad pública",
+    "¿Qué carreras me recomiendas?",
+]
+
+
+async def run_user(client, url, endpoint, turns, latencies, errors):
+    user_id = f"bench-{uuid.uuid4()}"
+
+    for i in range(turns):
+        payload = {"user_id": user_id, "message": MESSAGES[i % len(MESSAGES)]}
+        start = time.perf_counter()
+        try:
+            if endpoint == "/chat/stream":
+                async with client.stream("POST", url + endpoint, json=payload) as res:
+                    res.raise_for_status()
+                    async for _ in res.aiter_bytes():
+                        pass
+            else:
+                res = await client.post(url + endpoint, json=payload)
+                res.raise_for_status()
+        except httpx.HTTPError as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", default="/chat", choices=["/chat", "/chat/stream"])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.users)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_user(client, args.url, args.endpoint, args.turns, latencies, errors)
+            for _ in range(args.users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    total = len(latencies)
+    print(f"endpoint={args.endpoint} users={args.users} turns={args.turns}")
+    print(f"ok={total} errores={len(errors)} tiempo_total={elapsed:.2f}s")
+    print(f"throughput={total / elapsed:.2f} req/s")
+    if latencies:
+        print(
+            f"latencia p50={percentile(latencies, 50):.2f}s "
+            f"p95={percentile(latencies, 95):.2f}s "
+            f"media={statistics.mean(latencies):.2f}s"
+        )
+    for e in errors[:5]:
+        print("  ", e)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
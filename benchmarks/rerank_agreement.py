@@ -0,0 +1,91 @@
+"""
+Reranker remoto (Voyage) vs local (cross-encoder) sobre un set fijo de perfiles.
+
+    python -m benchmarks.rerank_agreement --candidates 40 --top-k 5
+
+Para cada perfil de benchmarks/fixtures.py se arma un set de candidatos
+determinista (solapamiento léxico con el catálogo) y se rerankea con ambos
+backends. Reporta latencia p50/p95 por backend y acuerdo del ranking:
+overlap@k (fracción de carreras compartidas en el top-k) y acuerdo en top-1.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import unicodedata
+
+from ai_backeng.http_client import close_http_client
+from ai_backeng.rerank.documents import build_rerank_document
+from ai_backeng.rerank.local_rerank import local_rerank, warmup_local_rerank
+from ai_backeng.rerank.voyage_rerank import voyage_rerank
+from benchmarks.fixtures import PROFILES, load_careers, profile_query
+
+
+def tokens(text: str) -> set[str]:
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    return {t for t in "".join(c if c.isalnum() else " " for c in text).split() if len(t) > 3}
+
+
+def candidates_for(query: str, careers: list[dict], n: int) -> list[dict]:
+    q = tokens(query)
+    scored = sorted(
+        careers,
+        key=lambda c: (-len(q & tokens(c["career_name"] + " " + c["description"][:500])), c["career_id"])
+    )
+    return scored[:n]
+
+
+async def timed(func, *args):
+    start = time.perf_counter()
+    result = await func(*args)
+    return result, time.perf_counter() - start
+
+
+def summary(name, latencies):
+    latencies = sorted(latencies)
+    return (
+        f"{name:<7} p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p95={latencies[int(0.95 * (len(latencies) - 1))] * 1000:7.1f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    careers = load_careers()
+    await warmup_local_rerank()
+
+    lat_voyage, lat_local, overlaps, top1 = [], [], [], []
+
+    for profile in PROFILES:
+        query = profile_query(profile)
+        docs = [build_rerank_document(c) for c in candidates_for(query, careers, args.candidates)]
+
+        remote, t_remote = await timed(voyage_rerank, query, docs, args.top_k)
+        local, t_local = await timed(local_rerank, query, docs, args.top_k)
+        lat_local.append(t_local)
+
+        if remote is None:
+            print(f"⚠ Voyage no respondió para: {query}")
+            continue
+
+        lat_voyage.append(t_remote)
+        overlaps.append(len(set(remote) & set(local)) / args.top_k)
+        top1.append(remote[0] == local[0])
+
+    await close_http_client()
+
+    print(f"perfiles={len(PROFILES)} candidatos={args.candidates} top_k={args.top_k}")
+    if lat_voyage:
+        print(summary("voyage", lat_voyage))
+    print(summary("local", lat_local))
+    if overlaps:
+        print(f"overlap@{args.top_k}={statistics.mean(overlaps):.2f} top1={sum(top1) / len(top1):.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
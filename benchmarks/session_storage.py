@@ -0,0 +1,143 @@
+"""
+Sesión en Redis: JSON único (formato anterior) vs hash con embedding binario.
+
+    python -m benchmarks.session_storage --dim 1024
+    python -m benchmarks.session_storage --dim 1024 --redis redis://localhost:6379/0
+
+Sin --redis mide bytes por sesión, bytes escritos por un turno típico y CPU
+de serializar/parsear. Con --redis además mide la latencia de guardar y leer
+cada formato contra un Redis real (usa keys bench:session:* y las borra al
+terminar).
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from ai_backeng.memory.session_codec import decode_fields, decode_session, diff_session, dumps, encode_session
+
+
+def sample_profile(dim: int, recommendations: int) -> dict:
+    rng = np.random.default_rng(0)
+    embedding = rng.standard_normal(dim)
+    return {
+        "nombre": "Ana",
+        "intereses": ["programación", "videojuegos", "robótica"],
+        "habilidades_percibidas": ["lógica", "creatividad"],
+        "preferencias": {"modalidad": "presencial", "ciudad": "Quito", "universidad_publica": True},
+        "descripcion_libre": "",
+        "user_embedding": (embedding / np.linalg.norm(embedding)).tolist(),
+        "meta": {"created_at": "2025-01-01T00:00:00+00:00", "last_seen_at": "2025-01-01T00:10:00+00:00",
+                 "last_greeted_at": None, "message_count": 12},
+        "recomendaciones": [
+            {"career_id": str(uuid4()), "career_name": f"Carrera {i}", "university_id": i,
+             "university_name": "Universidad", "timestamp": "2025-01-01T00:05:00+00:00",
+             "context": "me gusta programar", "score": 0.8}
+            for i in range(recommendations)
+        ],
+        "materias_fuertes": ["matemáticas", "física"],
+        "materias_debiles": ["historia"],
+    }
+
+
+def per_call_us(func, arg, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(arg)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def legacy_dumps(profile):
+    return json.dumps(profile, ensure_ascii=False)
+
+
+def session_fields(profile):
+    """Campos del hash: las recomendaciones viven en su propio sorted set."""
+    return encode_session({k: v for k, v in profile.items() if k != "recomendaciones"})
+
+
+async def redis_latency(url, profile, repeats):
+    import redis.asyncio as redis
+
+    client = redis.Redis.from_url(url, decode_responses=False)
+    legacy_key, hash_key = "bench:session:legacy", "bench:session:hash"
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await client.setex(legacy_key, 3600, legacy_dumps(profile))
+    results["legacy_save"] = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        json.loads(await client.get(legacy_key))
+    results["legacy_get"] = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(hash_key)
+            pipe.hset(hash_key, mapping=session_fields(profile))
+            pipe.expire(hash_key, 3600)
+            await pipe.execute()
+    results["hash_save"] = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode_session(decode_fields(await client.hgetall(hash_key)))
+    results["hash_get"] = (time.perf_counter() - start) / repeats * 1000
+
+    await client.delete(legacy_key, hash_key)
+    await client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--recommendations", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=500)
+    parser.add_argument("--redis", help="URL de Redis para medir latencia real")
+    args = parser.parse_args()
+
+    profile = sample_profile(args.dim, args.recommendations)
+
+    legacy = legacy_dumps(profile).encode("utf-8")
+    fields = session_fields(profile)
+    hashed_bytes = sum(len(k) + len(v) for k, v in fields.items())
+    stored = {k.encode(): v for k, v in fields.items()}
+
+    def hash_get(raw):
+        return decode_session(decode_fields(raw))
+
+    print(f"dim={args.dim} recomendaciones={args.recommendations}")
+    print(f"bytes   json={len(legacy):7d}  hash={hashed_bytes:7d}  ({len(legacy) / hashed_bytes:.1f}x)")
+    print(
+        f"save    json={per_call_us(legacy_dumps, profile, args.repeats):8.1f}µs  "
+        f"hash={per_call_us(session_fields, profile, args.repeats):8.1f}µs"
+    )
+    print(
+        f"get     json={per_call_us(json.loads, legacy, args.repeats):8.1f}µs  "
+        f"hash={per_call_us(hash_get, stored, args.repeats):8.1f}µs"
+    )
+
+    # Turno típico: un interés nuevo y meta actualizada (sin re-embedding)
+    turn = {**profile, "intereses": profile["intereses"] + ["ciberseguridad"],
+            "meta": {**profile["meta"], "last_seen_at": "2025-01-01T00:11:00+00:00", "message_count": 13}}
+    sets, ops = diff_session(fields, session_fields(turn))
+    turn_bytes = sum(len(k) + len(v) for k, v in sets.items()) + len(dumps(ops))
+    print(f"escrito por turno  json={len(legacy_dumps(turn).encode('utf-8')):7d}  hash={turn_bytes:7d}")
+
+    if args.redis:
+        res = asyncio.run(redis_latency(args.redis, profile, args.repeats))
+        print(
+            f"redis   save json={res['legacy_save']:.3f}ms hash={res['hash_save']:.3f}ms  "
+            f"get json={res['legacy_get']:.3f}ms hash={res['hash_get']:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Costo de transportar un embedding: literal de texto vs codec binario.
+
+    python -m benchmarks.vector_codec --dim 1024
+    python -m benchmarks.vector_codec --dim 1024 --dsn postgresql://...   # + round-trip real
+
+Sin --dsn mide encode en el cliente y el parseo equivalente del texto
+(lo que Postgres hace con cada '[...]') contra empaquetar/desempaquetar
+float32. Con --dsn además mide SELECT $1::vector con cada formato.
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from ai_backeng.db.vector import decode_vector, encode_vector, register_vector_codec, to_pgvector
+
+
+def per_call_us(func, arg, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(arg)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def parse_text(literal: str):
+    return [float(x) for x in literal[1:-1].split(",")]
+
+
+async def round_trip(dsn, vec, repeats):
+    import asyncpg
+
+    text_conn = await asyncpg.connect(dsn)
+    bin_conn = await asyncpg.connect(dsn)
+    await register_vector_codec(bin_conn)
+
+    literal = to_pgvector(vec)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await text_conn.fetchval("SELECT $1::vector::text", literal)
+    text_ms = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        await bin_conn.fetchval("SELECT $1::vector", vec)
+    bin_ms = (time.perf_counter() - start) / repeats * 1000
+
+    await text_conn.close()
+    await bin_conn.close()
+    print(f"round-trip texto={text_ms:.3f}ms binario={bin_ms:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--dsn")
+    args = parser.parse_args()
+
+    vec = np.random.default_rng(0).standard_normal(args.dim).astype(np.float32)
+    as_list = vec.tolist()
+    literal = to_pgvector(as_list)
+    packed = encode_vector(vec)
+
+    print(f"dim={args.dim} bytes texto={len(literal.encode())} binario={len(packed)}")
+    print(
+        f"encode  texto={per_call_us(to_pgvector, as_list, args.repeats):8.1f}us "
+        f"binario={per_call_us(encode_vector, vec, args.repeats):8.1f}us"
+    )
+    print(
+        f"parse   texto={per_call_us(parse_text, literal, args.repeats):8.1f}us "
+        f"binario={per_call_us(decode_vector, packed, args.repeats):8.1f}us"
+    )
+
+    if args.dsn:
+        asyncio.run(round_trip(args.dsn, vec, args.repeats // 10))
+
+
+if __name__ == "__main__":
+    main()